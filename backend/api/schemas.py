@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr
 from enum import Enum
-from typing import Optional, List, Dict, Union
+from typing import Optional, List, Dict, Union, Any
+from datetime import datetime
 
 # Enums for Role & License
 class RoleEnum(str, Enum):
@@ -57,6 +58,27 @@ class SentimentOut(BaseModel):
     summary: str                 
     percentage: Dict[str, int]  
 
+class SentimentDistribution(BaseModel):
+    total: int
+    counts: Dict[str, int]
+    percentage: Dict[str, int]
+
+class SentimentKeywordCount(BaseModel):
+    keyword: str
+    count: int
+
+class SentimentEntryOut(SentimentOut):
+    index: int
+    category: Optional[str] = None
+
+class SentimentReportOut(BaseModel):
+    overall: SentimentDistribution
+    categories: Dict[str, SentimentDistribution]
+    top_keywords: Dict[str, List[SentimentKeywordCount]]
+    entries: Optional[List[SentimentEntryOut]] = None
+    page: Optional[int] = None
+    page_size: Optional[int] = None
+
 # Image Label
 class ImageLabelOut(BaseModel):
     product_name: str
@@ -64,6 +86,13 @@ class ImageLabelOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+class ImageBatchItemOut(BaseModel):
+    index: int
+    filename: str
+    results: List[ImageLabelOut] = []
+    source: Optional[str] = None    # cache, db, local or vision
+    error: Optional[str] = None
         
 # Agentic Product Search 
 class AgenticProductSearchIn(BaseModel):
@@ -74,4 +103,27 @@ class AgenticProductSearchIn(BaseModel):
 class AgenticProductSearchOut(BaseModel):
     message: str
     products: list[dict] = []
-    purchased: bool = False
\ No newline at end of file
+    purchased: bool = False
+
+# Background Jobs
+class JobSubmitOut(BaseModel):
+    job_id: str
+    status: str
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class JobResultOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    result: Any = None
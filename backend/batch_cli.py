@@ -0,0 +1,218 @@
+"""Offline batch runner for the four use cases.
+
+Runs the same service logic as the HTTP routes over a directory, a glob or a JSONL file
+and streams one JSON result per input to an output JSONL file. Re-running with the same
+output file skips inputs that already have a result (resume from checkpoint) and retries the
+ones that failed; the output is append-only, so the last line for an id is the one that counts.
+
+Examples:
+    python batch_cli.py sentiment "exports/*.txt" -o sentiment.jsonl
+    python batch_cli.py translation docs/ -o fr.jsonl --input-lang en --output-lang fr
+    python batch_cli.py image photos/ -o labels.jsonl --workers 4
+    python batch_cli.py product-search queries.jsonl -o products.jsonl
+
+JSONL input records carry an optional "id" plus "text" (sentiment, translation),
+"path" (any file-based use case) or "query" (product search).
+"""
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, ALL_COMPLETED, wait
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from db.database import SessionLocal, engine, Base
+from core.ocr import preload_readers
+from api.schemas import AgenticProductSearchIn
+from service.sentiment.keyword_index import get_keyword_index
+from service.sentiment.local_model import get_local_classifier
+from service.sentiment.sentiment_pipeline import extract_feedback_content, iter_feedback_entries, score_entries
+from service.langauge.translation_service import extract_text_from_file, translate_text, PDF_STRATEGIES
+from service.langauge.model_registry import translation_registry
+from service.image.image_classification_service import classify_image
+from service.agentic.agentic_product_search_service import validate_product_search, run_product_search
+import argparse
+import glob
+import json as pyjson
+import os
+import sys
+import time
+
+USE_CASES = ("sentiment", "translation", "image", "product-search")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+DOCUMENT_EXTENSIONS = (".txt", ".pdf", ".docx")
+
+# Per-worker state, populated once by _init_worker
+_worker = {}
+
+
+def iter_inputs(source: str, use_case: str):
+    """Yield (record_id, record) for every input in a directory, glob or JSONL file."""
+    if source.endswith(".jsonl") and os.path.isfile(source):
+        with open(source, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = pyjson.loads(line)
+                yield str(record.get("id", f"{source}:{line_no}")), record
+        return
+    if os.path.isdir(source):
+        paths = sorted(os.path.join(source, name) for name in os.listdir(source))
+    else:
+        paths = sorted(glob.glob(source, recursive=True))
+    extensions = IMAGE_EXTENSIONS if use_case == "image" else DOCUMENT_EXTENSIONS
+    for path in paths:
+        if os.path.isfile(path) and path.lower().endswith(extensions):
+            yield path, {"path": path}
+
+
+def load_checkpoint(output_path: str):
+    """Return the ids whose latest line in the output file has a result; failed ids are retried."""
+    succeeded = {}
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = pyjson.loads(line)
+                # Lines are appended in run order, so a retry's line supersedes the earlier one
+                succeeded[record["id"]] = "result" in record
+            except (ValueError, KeyError, TypeError):
+                # Partially written last line from an interrupted run
+                continue
+    return {record_id for record_id, ok in succeeded.items() if ok}
+
+
+def _init_worker(use_case: str, options: dict):
+    """Open a DB session and warm the models for this use case once per worker process."""
+    _worker["db"] = SessionLocal()
+    _worker["use_case"] = use_case
+    _worker["options"] = options
+    if use_case == "sentiment":
+        get_keyword_index(_worker["db"])
+        get_local_classifier()
+    elif use_case in ("image", "translation"):
+        preload_readers()
+    if use_case == "translation" and options.get("input_lang") and options.get("output_lang"):
+        translation_registry.preload([f"{options['input_lang']}-{options['output_lang']}"])
+
+
+def _read_bytes(record: dict):
+    with open(record["path"], "rb") as f:
+        return f.read()
+
+
+def _run_sentiment(record: dict):
+    if "text" in record:
+        content = record["text"]
+    else:
+        content = extract_feedback_content(record["path"], _read_bytes(record))
+    keyword_index = get_keyword_index(_worker["db"])
+    return [result_obj for _, _, result_obj in score_entries(iter_feedback_entries(content), keyword_index)]
+
+
+def _run_translation(record: dict):
+    options = _worker["options"]
+    if "text" in record:
+        text = record["text"]
+    else:
+        text = extract_text_from_file(record["path"], _read_bytes(record), pdf_strategy=options.get("pdf_strategy"))
+    text = text.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="No text found in the document or input.")
+    input_lang = record.get("input_lang", options.get("input_lang"))
+    output_lang = record.get("output_lang", options.get("output_lang"))
+    return {"translated_text": translate_text(_worker["db"], input_lang, output_lang, text)}
+
+
+def _run_image(record: dict):
+    return jsonable_encoder(classify_image(_worker["db"], _read_bytes(record)))
+
+
+def _run_product_search(record: dict):
+    data = AgenticProductSearchIn(query=record.get("query", ""), action="search")
+    validate_product_search(data)
+    return jsonable_encoder(run_product_search(_worker["db"], data))
+
+
+RUNNERS = {
+    "sentiment": _run_sentiment,
+    "translation": _run_translation,
+    "image": _run_image,
+    "product-search": _run_product_search,
+}
+
+
+def process_record(record_id: str, record: dict):
+    """Worker entry point: returns one output line as a dict, never raises."""
+    start = time.time()
+    try:
+        result = RUNNERS[_worker["use_case"]](record)
+        out = {"id": record_id, "result": result}
+    except HTTPException as e:
+        _worker["db"].rollback()
+        out = {"id": record_id, "error": str(e.detail)}
+    except Exception as e:
+        _worker["db"].rollback()
+        out = {"id": record_id, "error": str(e)}
+    out["seconds"] = round(time.time() - start, 4)
+    return out
+
+
+def run(use_case: str, source: str, output_path: str, workers: int, options: dict):
+    Base.metadata.create_all(bind=engine)
+
+    done = load_checkpoint(output_path)
+    if os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                # Terminate a partially written line so appended results stay parseable
+                f.write(b"\n")
+    if done:
+        print(f"Resuming: {len(done)} input(s) already in {output_path}")
+    processed = failed = 0
+    max_in_flight = workers * 4
+    with open(output_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(use_case, options)
+    ) as executor:
+        in_flight = set()
+
+        def drain(return_when):
+            nonlocal processed, failed, in_flight
+            finished, in_flight = wait(in_flight, return_when=return_when)
+            for future in finished:
+                line = future.result()
+                out.write(pyjson.dumps(line, ensure_ascii=False) + "\n")
+                processed += 1
+                failed += "error" in line
+            out.flush()
+
+        for record_id, record in iter_inputs(source, use_case):
+            if record_id in done:
+                continue
+            in_flight.add(executor.submit(process_record, record_id, record))
+            if len(in_flight) >= max_in_flight:
+                drain(FIRST_COMPLETED)
+        if in_flight:
+            drain(ALL_COMPLETED)
+    print(f"Processed {processed} input(s), {failed} failed -> {output_path}")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a use case offline over many inputs.")
+    parser.add_argument("use_case", choices=USE_CASES)
+    parser.add_argument("source", help="Directory, glob pattern or JSONL file")
+    parser.add_argument("-o", "--output", required=True, help="Output JSONL file (also the resume checkpoint)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--input-lang", help="Source language code for translation")
+    parser.add_argument("--output-lang", help="Target language code for translation")
+    parser.add_argument("--pdf-strategy", choices=PDF_STRATEGIES, help="How PDF pages are read for translation (default: TRANSLATION_PDF_STRATEGY)")
+    args = parser.parse_args(argv)
+    if args.use_case == "translation" and not args.source.endswith(".jsonl") and not (args.input_lang and args.output_lang):
+        parser.error("translation over files requires --input-lang and --output-lang")
+    options = {"input_lang": args.input_lang, "output_lang": args.output_lang, "pdf_strategy": args.pdf_strategy}
+    failed = run(args.use_case, args.source, args.output, max(1, args.workers), options)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+from docx import Document
+import fitz
+import io
+import random
+
+# Keyword sets used both to seed SentimentLabel rows and to build keyword-hit lines
+DEFAULT_LABELS = {
+    "Positive": ["good", "great", "excellent", "thanks", "resolved", "helpful", "fast", "love"],
+    "Negative": ["bad", "broken", "slow", "crash", "error", "refund", "angry", "useless"],
+}
+
+SUBJECTS = ["the app", "my account", "the invoice", "support", "the update", "login", "the dashboard", "checkout"]
+NEUTRAL_VERBS = ["is", "was", "seems", "looks", "became", "remains"]
+NEUTRAL_TAILS = ["today", "since monday", "after the release", "on my phone", "for the team", "this week"]
+# Template lines that repeat across real helpdesk exports
+COMMON_LINES = [
+    "thanks",
+    "still not working",
+    "please advise",
+    "sent from my iphone",
+    "kind regards",
+    "any update on this ticket",
+    "same issue as before",
+]
+
+
+def iter_corpus(n_lines: int, keyword_hit_ratio: float = 0.6, duplicate_rate: float = 0.2, seed: int = 42):
+    """Yield ``n_lines`` synthetic helpdesk lines.
+
+    ``keyword_hit_ratio`` of the unique lines contain a label keyword; ``duplicate_rate`` of
+    all lines repeat a common template line or an earlier line.
+    """
+    rng = random.Random(seed)
+    all_keywords = [kw for kws in DEFAULT_LABELS.values() for kw in kws]
+    recent = []
+    for i in range(n_lines):
+        if recent and rng.random() < duplicate_rate:
+            yield rng.choice(COMMON_LINES) if rng.random() < 0.5 else rng.choice(recent)
+            continue
+        words = [rng.choice(SUBJECTS), rng.choice(NEUTRAL_VERBS)]
+        if rng.random() < keyword_hit_ratio:
+            words.append(rng.choice(all_keywords))
+        else:
+            words.append(f"ticket{rng.randint(1, 10 ** 6)}")
+        words.append(rng.choice(NEUTRAL_TAILS))
+        line = " ".join(words)
+        if len(recent) < 1000:
+            recent.append(line)
+        else:
+            recent[i % 1000] = line
+        yield line
+
+
+def build_document(lines, file_format: str) -> bytes:
+    """Render lines as a TXT, DOCX or PDF upload, one feedback entry per line."""
+    if file_format == "txt":
+        return "\n".join(lines).encode("utf-8")
+    if file_format == "docx":
+        doc = Document()
+        for line in lines:
+            doc.add_paragraph(line)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+    if file_format == "pdf":
+        pdf = fitz.open()
+        lines_per_page = 50
+        for start in range(0, len(lines), lines_per_page):
+            page = pdf.new_page()
+            page.insert_text((40, 50), "\n".join(lines[start:start + lines_per_page]), fontsize=9)
+        return pdf.tobytes()
+    raise ValueError(f"Unsupported benchmark format: {file_format}")
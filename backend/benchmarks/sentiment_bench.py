@@ -0,0 +1,202 @@
+"""Reproducible throughput/latency benchmark for the sentiment pipeline.
+
+Each scenario runs in a fresh process so peak RSS is measured per scenario. Groq is
+replaced by the gateway's FakeLLMBackend with a configurable latency; the local model tier is off
+unless --local-backend is given.
+
+Example:
+    python -m benchmarks.sentiment_bench --sizes 1000 100000 --formats txt docx pdf \\
+        --hit-ratio 0.6 --duplicate-rate 0.3 --llm-latency 0.2 --json bench.json
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import contextlib
+import json as pyjson
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+TARGETS = ("pipeline", "analyze_utils")
+FORMATS = ("txt", "docx", "pdf")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def _peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return round(usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024, 1)
+
+
+def _summarize(latencies, elapsed, entries):
+    latencies.sort()
+    return {
+        "entries": entries,
+        "seconds": round(elapsed, 4),
+        "entries_per_second": round(entries / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def _labels():
+    from benchmarks.corpus import DEFAULT_LABELS
+
+    class _Label:
+        def __init__(self, label, keywords):
+            self.label = label
+            self.keywords = keywords
+
+    return [_Label(label, ", ".join(keywords)) for label, keywords in DEFAULT_LABELS.items()]
+
+
+def _memory_session_factory():
+    """Sessions on a throwaway in-memory database, shared by the scoring threads."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from db.database import Base
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _bench_pipeline(document, file_format, options):
+    from service.sentiment.keyword_index import KeywordIndex
+    from core.llm_gateway import LLMGateway, FakeLLMBackend
+    from service.sentiment.result_cache import ResultCache
+    from service.sentiment.sentiment_pipeline import extract_feedback_content, iter_feedback_entries, score_entries
+
+    backend = FakeLLMBackend(latency=options["llm_latency"], seed=options["seed"])
+    client = LLMGateway(backend=backend)
+    cache = ResultCache(session_factory=_memory_session_factory()) if options["cache"] else None
+    keyword_index = KeywordIndex(_labels())
+
+    start = time.perf_counter()
+    content = extract_feedback_content(f"bench.{file_format}", document)
+    extract_seconds = time.perf_counter() - start
+
+    pulled_at = {}
+
+    def timed_entries():
+        for index, entry in enumerate(iter_feedback_entries(content)):
+            pulled_at[index] = time.perf_counter()
+            yield entry
+
+    latencies = []
+    count = 0
+    for index, _, _ in score_entries(timed_entries(), keyword_index, window_size=options["window"],
+                                     llm_client=client, cache=cache):
+        latencies.append(time.perf_counter() - pulled_at.pop(index))
+        count += 1
+    elapsed = time.perf_counter() - start
+    metrics = _summarize(latencies, elapsed, count)
+    metrics["extract_seconds"] = round(extract_seconds, 4)
+    metrics["llm_calls"] = backend.calls
+    return metrics
+
+
+def _bench_analyze_utils(document, file_format, options):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from db.database import Base
+    from db.models import SentimentLabel
+    from service.sentiment.analyze_utils import analyze_sentiment_with_percentage
+    from service.sentiment.sentiment_pipeline import extract_feedback_content, iter_feedback_entries
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for label in _labels():
+        db.add(SentimentLabel(label=label.label, keywords=label.keywords))
+    db.commit()
+
+    start = time.perf_counter()
+    content = extract_feedback_content(f"bench.{file_format}", document)
+    latencies = []
+    count = 0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for entry in iter_feedback_entries(content):
+            if count >= options["analyze_utils_limit"]:
+                break
+            t0 = time.perf_counter()
+            analyze_sentiment_with_percentage(entry, db)
+            latencies.append(time.perf_counter() - t0)
+            count += 1
+    return _summarize(latencies, time.perf_counter() - start, count)
+
+
+def run_scenario(target, size, file_format, options):
+    """Build the corpus and run one target on it; executed in a fresh worker process."""
+    from benchmarks.corpus import iter_corpus, build_document
+
+    lines = list(iter_corpus(size, options["hit_ratio"], options["duplicate_rate"], options["seed"]))
+    document = build_document(lines, file_format)
+    del lines
+    runner = _bench_pipeline if target == "pipeline" else _bench_analyze_utils
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        metrics = runner(document, file_format, options)
+    metrics.update({"target": target, "lines": size, "format": file_format, "peak_rss_mb": _peak_rss_mb()})
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sentiment pipeline on synthetic helpdesk corpora.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["txt"])
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--hit-ratio", type=float, default=0.6, help="Share of unique lines containing a keyword")
+    parser.add_argument("--duplicate-rate", type=float, default=0.2, help="Share of lines repeating earlier/template lines")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Fake LLM latency per call in seconds")
+    parser.add_argument("--window", type=int, default=200, help="Scoring window size")
+    parser.add_argument("--local-backend", default="off", help="SENTIMENT_LOCAL_BACKEND for the run (default: off)")
+    parser.add_argument("--cache", action="store_true", help="Use the result cache (on a throwaway in-memory database)")
+    parser.add_argument("--analyze-utils-limit", type=int, default=10000, help="Max entries timed for analyze_utils")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Read at import time by the spawned scenario processes
+    os.environ["SENTIMENT_LOCAL_BACKEND"] = args.local_backend
+    if not args.cache:
+        os.environ["SENTIMENT_CACHE_ENABLED"] = "0"
+    options = {
+        "hit_ratio": args.hit_ratio,
+        "duplicate_rate": args.duplicate_rate,
+        "llm_latency": args.llm_latency,
+        "window": args.window,
+        "cache": args.cache,
+        "analyze_utils_limit": args.analyze_utils_limit,
+        "seed": args.seed,
+    }
+
+    results = []
+    header = f"{'target':<14}{'format':<7}{'lines':>9}{'entries/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss MB':>9}"
+    print(header)
+    print("-" * len(header))
+    context = multiprocessing.get_context("spawn")
+    for target in args.targets:
+        for file_format in args.formats:
+            for size in args.sizes:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    metrics = executor.submit(run_scenario, target, size, file_format, options).result()
+                results.append(metrics)
+                print(f"{target:<14}{file_format:<7}{size:>9}{metrics['entries_per_second']:>12}"
+                      f"{metrics['p50_ms']:>10}{metrics['p95_ms']:>10}{metrics['p99_ms']:>10}{metrics['peak_rss_mb']:>9}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            pyjson.dump({"options": options, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
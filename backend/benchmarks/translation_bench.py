@@ -0,0 +1,115 @@
+"""Throughput and memory benchmark for the translation backends.
+
+Each pair/backend scenario runs in a fresh process so load time, RSS and peak RSS are measured
+per scenario. Converted artifacts are built first if missing and benchmarked whether or not they passed
+validation (see service.langauge.translation_backends).
+
+Example:
+    python -m benchmarks.translation_bench --pairs en-fr en-de --backends torch int8 onnx onnx-int8 \\
+        --repeats 3 --json translation_bench.json
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import contextlib
+import json as pyjson
+import multiprocessing
+import os
+import sys
+import time
+
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError):
+        return None
+
+
+def run_scenario(pair, backend, samples, options):
+    """Load one pair on one backend and translate the samples; executed in a fresh worker process."""
+    from benchmarks.sentiment_bench import _peak_rss_mb
+    from service.langauge.model_registry import TRANSLATION_MODEL_TEMPLATE, _model_bytes
+    from transformers import pipeline
+    from service.langauge.translation_backends import _load_artifact, convert_model, sample_sentences
+    from service.langauge.translation_service import translate_segments
+
+    src, _, tgt = pair.partition("-")
+    samples = samples or sample_sentences(src, tgt)
+    if not samples:
+        return {"pair": pair, "backend": backend, "error": "no sample sentences; pass --samples"}
+    model_name = TRANSLATION_MODEL_TEMPLATE.format(src=src, tgt=tgt)
+    if backend != "torch":
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            convert_model(model_name, backend)
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    if backend == "torch":
+        translator = pipeline("translation", model=model_name)
+    else:
+        translator = _load_artifact(model_name, backend)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = _rss_mb()
+
+    translate_segments(translator, samples[:1])  # warm-up
+    source_tokens = sum(len(ids) for ids in translator.tokenizer(samples, add_special_tokens=False)["input_ids"])
+    output_tokens = 0
+    start = time.perf_counter()
+    for _ in range(options["repeats"]):
+        outputs = translate_segments(translator, samples, batch_size=options["batch_size"])
+        output_tokens += sum(len(ids) for ids in translator.tokenizer(text_target=outputs, add_special_tokens=False)["input_ids"])
+    elapsed = time.perf_counter() - start
+    return {
+        "pair": pair,
+        "backend": backend,
+        "samples": len(samples),
+        "repeats": options["repeats"],
+        "load_seconds": round(load_seconds, 2),
+        "seconds": round(elapsed, 3),
+        "source_tokens_per_second": round(source_tokens * options["repeats"] / elapsed, 1) if elapsed else 0.0,
+        "output_tokens_per_second": round(output_tokens / elapsed, 1) if elapsed else 0.0,
+        "model_mb": round(_model_bytes(translator) / 1024 / 1024, 1),
+        "rss_load_mb": round(rss_loaded - rss_before, 1) if rss_before is not None and rss_loaded is not None else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    from service.langauge.translation_backends import read_samples
+
+    parser = argparse.ArgumentParser(description="Compare translation backends per language pair.")
+    parser.add_argument("--pairs", nargs="+", default=["en-fr"])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--samples", help="Text file with one source sentence per line (default: translation memory / built-in)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    samples = read_samples(args.samples) if args.samples else None
+    options = {"repeats": max(1, args.repeats), "batch_size": args.batch_size}
+    results = []
+    header = f"{'pair':<8}{'backend':<11}{'src tok/s':>11}{'out tok/s':>11}{'load s':>8}{'model MB':>10}{'rss MB':>9}{'peak MB':>9}"
+    print(header)
+    print("-" * len(header))
+    context = multiprocessing.get_context("spawn")
+    for pair in args.pairs:
+        for backend in args.backends:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                metrics = executor.submit(run_scenario, pair.strip().lower(), backend, samples, options).result()
+            results.append(metrics)
+            if "error" in metrics:
+                print(f"{pair:<8}{backend:<11}{metrics['error']}")
+                continue
+            print(f"{pair:<8}{backend:<11}{metrics['source_tokens_per_second']:>11}{metrics['output_tokens_per_second']:>11}"
+                  f"{metrics['load_seconds']:>8}{metrics['model_mb']:>10}{str(metrics['rss_load_mb']):>9}{metrics['peak_rss_mb']:>9}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            pyjson.dump({"options": options, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+import asyncio
+import json as pyjson
+import os
+import random
+import re
+import threading
+import time
+
+# One LLM gateway per process, shared by sentiment, image and agentic search. Calls run on a
+# dedicated event loop thread with one pooled async client, so sync callers (threads, jobs,
+# the batch CLI) and async routes share the same connection pool, limits and breaker.
+# LLM_BACKEND: "groq" or "fake" (offline heuristic backend for load tests)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MODEL_CONCURRENCY = int(os.getenv("LLM_MODEL_CONCURRENCY", "8"))
+# Per-model overrides, e.g. "llama-3.3-70b-versatile=4,meta-llama/llama-4-scout-17b-16e-instruct=2"
+LLM_MODEL_LIMITS = os.getenv("LLM_MODEL_LIMITS", "")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+# Consecutive failed attempts that open the breaker, and how long it stays open
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+LLM_FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", "0"))
+LLM_FAKE_FAILURE_RATE = float(os.getenv("LLM_FAKE_FAILURE_RATE", "0"))
+
+# Client errors that will not succeed on retry
+_NON_RETRYABLE_STATUS = {400, 401, 403, 404, 422}
+
+
+def _is_service_failure(error: Exception) -> bool:
+    """Timeouts, transport errors (no HTTP status) and 5xx count against the breaker; 4xx are the caller's fault."""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is None or status >= 500
+
+
+class LLMUnavailable(Exception):
+    """Raised when the circuit breaker is open and calls are being short-circuited."""
+
+
+def _parse_model_limits(value: str):
+    limits = {}
+    for part in value.split(","):
+        if "=" in part:
+            model, limit = part.rsplit("=", 1)
+            limits[model.strip()] = int(limit)
+    return limits
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures -> half-open (one trial call) after `reset_seconds`."""
+
+    def __init__(self, threshold=LLM_BREAKER_THRESHOLD, reset_seconds=LLM_BREAKER_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.threshold:
+                self.opened_at = time.time()
+            self.trial_in_flight = False
+
+    def release_trial(self):
+        """End a half-open trial call that failed for a reason that says nothing about the service."""
+        with self._lock:
+            self.trial_in_flight = False
+
+
+class GroqBackend:
+    """Groq chat completions through one pooled AsyncGroq client (created on the gateway loop)."""
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self._client = None
+
+    async def complete(self, messages, model, **kwargs):
+        if self._client is None:
+            from groq import AsyncGroq
+            # Retries and timeouts are handled by the gateway
+            self._client = AsyncGroq(api_key=self.api_key, max_retries=0)
+        chat_completion = await self._client.chat.completions.create(messages=messages, model=model, **kwargs)
+        if not chat_completion or not chat_completion.choices:
+            raise ValueError("No response from the model.")
+        return chat_completion.choices[0].message.content or ""
+
+
+class FakeLLMBackend:
+    """Offline backend with configurable latency and failure rate.
+
+    Recognises the sentiment batch, image vision and product suggestion prompts and answers
+    each with a cheap heuristic, so throughput can be measured without network access.
+    """
+
+    POSITIVE_HINTS = ("good", "great", "thank", "love", "excellent", "happy", "resolved")
+    NEGATIVE_HINTS = ("bad", "not", "never", "broken", "slow", "issue", "error", "fail")
+
+    def __init__(self, latency=LLM_FAKE_LATENCY, failure_rate=LLM_FAKE_FAILURE_RATE, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    async def complete(self, messages, model, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError("Fake LLM simulated failure")
+        content = messages[-1]["content"]
+        if isinstance(content, list):
+            return pyjson.dumps([{"product_name": "unknown product", "category": "other"}])
+        try:
+            items = pyjson.loads(content)
+        except ValueError:
+            items = None
+        if isinstance(items, list):
+            return pyjson.dumps([self._sentiment(item) for item in items])
+        query = re.sub(r"^Suggest 3 unique products for: ", "", content).split(". ")[0]
+        return pyjson.dumps([
+            {"name": f"{query} {n}", "category": "other", "price": 9.99 * n, "in_stock": n}
+            for n in range(1, 4)
+        ])
+
+    def _sentiment(self, item):
+        text = str(item.get("text", "")).lower()
+        pos = sum(text.count(h) for h in self.POSITIVE_HINTS)
+        neg = sum(text.count(h) for h in self.NEGATIVE_HINTS)
+        if pos > neg:
+            perc = {"Positive": 80, "Negative": 10, "Neutral": 10}
+        elif neg > pos:
+            perc = {"Positive": 10, "Negative": 80, "Neutral": 10}
+        else:
+            perc = {"Positive": 10, "Negative": 10, "Neutral": 80}
+        return {"index": item.get("index"), "summary": max(perc, key=perc.get), "percentage": perc}
+
+
+class LLMGateway:
+    """Chat completions with global/per-model concurrency limits, timeouts, backoff and a circuit breaker."""
+
+    def __init__(self, backend=None, max_concurrency=LLM_MAX_CONCURRENCY, model_concurrency=LLM_MODEL_CONCURRENCY,
+                 model_limits=None, timeout=LLM_TIMEOUT_SECONDS, max_retries=LLM_MAX_RETRIES,
+                 backoff_base=LLM_BACKOFF_BASE, backoff_max=LLM_BACKOFF_MAX, breaker=None):
+        self.backend = backend or GroqBackend()
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency
+        self.model_limits = model_limits if model_limits is not None else _parse_model_limits(LLM_MODEL_LIMITS)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._loop = None
+        self._lock = threading.Lock()
+        self._global_limit = None
+        self._model_limits = {}
+        self._random = random.Random()
+        self.in_flight = 0
+        self.stats = {"calls": 0, "succeeded": 0, "failed": 0, "retries": 0, "timeouts": 0, "short_circuited": 0}
+
+    def _get_loop(self):
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="llm-gateway", daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    def _limit_for(self, model):
+        # Only touched from the gateway loop, so no locking needed
+        if self._global_limit is None:
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        if model not in self._model_limits:
+            self._model_limits[model] = asyncio.Semaphore(self.model_limits.get(model, self.model_concurrency))
+        return self._model_limits[model]
+
+    def _backoff(self, attempt):
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        return self._random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _complete(self, messages, model, timeout, **kwargs):
+        self.stats["calls"] += 1
+        model_limit = self._limit_for(model)
+        # max_retries counts attempts; always make at least one
+        attempts = max(1, self.max_retries)
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                self.stats["short_circuited"] += 1
+                raise LLMUnavailable("LLM service is temporarily unavailable, please retry shortly.")
+            try:
+                async with self._global_limit, model_limit:
+                    self.in_flight += 1
+                    try:
+                        content = await asyncio.wait_for(self.backend.complete(messages, model, **kwargs), timeout)
+                    finally:
+                        self.in_flight -= 1
+                self.breaker.record_success()
+                self.stats["succeeded"] += 1
+                return content
+            except Exception as e:
+                if _is_service_failure(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release_trial()
+                if isinstance(e, asyncio.TimeoutError):
+                    self.stats["timeouts"] += 1
+                print(f"[llm] {model} attempt {attempt + 1} failed: {type(e).__name__}: {str(e)}")
+                if attempt == attempts - 1 or getattr(e, "status_code", None) in _NON_RETRYABLE_STATUS:
+                    self.stats["failed"] += 1
+                    raise
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt))
+            except BaseException:
+                # Cancellation (CancelledError is not an Exception) must not hold the half-open trial forever
+                self.breaker.release_trial()
+                raise
+
+    def submit(self, messages, model, timeout=None, **kwargs):
+        """Schedule a completion on the gateway loop; returns a concurrent.futures.Future of the content."""
+        coro = self._complete(messages, model, timeout or self.timeout, **kwargs)
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+    def complete(self, messages, model, timeout=None, **kwargs):
+        """Blocking completion for threads and sync code; returns the message content."""
+        return self.submit(messages, model, timeout, **kwargs).result()
+
+    async def acomplete(self, messages, model, timeout=None, **kwargs):
+        """Awaitable completion for async routes; never blocks the caller's event loop."""
+        return await asyncio.wrap_future(self.submit(messages, model, timeout, **kwargs))
+
+    def run_sync(self, coro):
+        """Run a coroutine that uses the gateway on the gateway loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result()
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats.update({
+            "backend": type(self.backend).__name__,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        })
+        return stats
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Return the process-wide gateway, creating it with the configured backend on first use."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                backend = FakeLLMBackend() if LLM_BACKEND in ("fake", "stub") else GroqBackend()
+                _gateway = LLMGateway(backend=backend)
+    return _gateway
@@ -0,0 +1,83 @@
+import easyocr
+import os
+import queue
+import threading
+import time
+
+# Readers are expensive (detector + recognizer weights), so they are loaded once per
+# language set and shared by every route. Each language set gets a small pool of readers;
+# a reader is used by one thread at a time.
+# OCR_PRELOAD_LANGS: language sets separated by ";", languages within a set by "," (e.g. "en;en,fr")
+OCR_PRELOAD_LANGS = [l.strip() for l in os.getenv("OCR_PRELOAD_LANGS", "en").split(";") if l.strip()]
+OCR_READERS_PER_LANG = int(os.getenv("OCR_READERS_PER_LANG", "1"))
+OCR_GPU = os.getenv("OCR_GPU", "0") == "1"
+
+
+class ReaderPool:
+    """Fixed-size pool of easyocr readers for one language set."""
+
+    def __init__(self, langs, size=OCR_READERS_PER_LANG, gpu=OCR_GPU):
+        self.langs = list(langs)
+        self.gpu = gpu
+        self.size = 0
+        self._readers = queue.Queue()
+        self._grow_lock = threading.Lock()
+        self.ensure_size(max(1, size))
+
+    def ensure_size(self, size: int):
+        """Load more readers until the pool holds at least size of them."""
+        with self._grow_lock:
+            if self.size >= size:
+                return
+            start = time.time()
+            added = size - self.size
+            for _ in range(added):
+                self._readers.put(easyocr.Reader(self.langs, gpu=self.gpu))
+            self.size = size
+            print(f"[ocr] Loaded {added} reader(s) for {self.langs} in {time.time() - start:.2f}s")
+
+    def readtext(self, image, **kwargs):
+        reader = self._readers.get()
+        try:
+            return reader.readtext(image, **kwargs)
+        finally:
+            self._readers.put(reader)
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _key(langs):
+    if isinstance(langs, str):
+        langs = langs.split(",")
+    return tuple(l.strip() for l in langs if l.strip())
+
+
+def get_reader_pool(langs=("en",), min_size=None) -> ReaderPool:
+    """Return the shared reader pool for a language set, loading it on first use.
+
+    min_size grows the pool for callers that run that many OCR calls side by side.
+    """
+    key = _key(langs)
+    pool = _registry.get(key)
+    if pool is None:
+        with _registry_lock:
+            pool = _registry.get(key)
+            if pool is None:
+                pool = ReaderPool(key)
+                _registry[key] = pool
+    if min_size is not None and pool.size < min_size:
+        pool.ensure_size(min_size)
+    return pool
+
+
+def readtext(image, langs=("en",), **kwargs):
+    """Run OCR with a shared reader; accepts the same keyword arguments as easyocr's readtext."""
+    return get_reader_pool(langs).readtext(image, **kwargs)
+
+
+def preload_readers(lang_sets=None):
+    """Load the configured language sets up front (called at startup)."""
+    for langs in (lang_sets if lang_sets is not None else OCR_PRELOAD_LANGS):
+        get_reader_pool(langs)
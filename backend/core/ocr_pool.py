@@ -0,0 +1,134 @@
+from concurrent.futures import ProcessPoolExecutor
+from core.ocr import preload_readers
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+
+# Image decoding + OCR tasks run in separate processes so a large photo never blocks the event loop.
+OCR_PROCESS_WORKERS = int(os.getenv("OCR_PROCESS_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Requests waiting or running beyond this are rejected with 429 instead of queueing forever
+OCR_MAX_QUEUE = int(os.getenv("OCR_MAX_QUEUE", str(OCR_PROCESS_WORKERS * 4)))
+# Torch intra-op threads per worker process; keeps workers from oversubscribing the cores
+OCR_THREADS_PER_WORKER = int(os.getenv("OCR_THREADS_PER_WORKER", "1"))
+
+
+class OcrQueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("OCR queue is full")
+        self.retry_after = retry_after
+
+
+def _init_worker(threads: int):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    preload_readers()
+
+
+def _timed_call(fn, args):
+    started_at = time.time()
+    result = fn(*args)
+    return result, time.time() - started_at, started_at
+
+
+class OcrProcessPool:
+    """Bounded process pool for OCR with queue-depth and wait-time accounting."""
+
+    def __init__(self, workers=OCR_PROCESS_WORKERS, max_queue=OCR_MAX_QUEUE, threads_per_worker=OCR_THREADS_PER_WORKER):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.threads_per_worker = threads_per_worker
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.stats = {"completed": 0, "rejected": 0, "total_wait": 0.0, "max_wait": 0.0, "total_run": 0.0}
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: forking a process that already holds torch threads can deadlock
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self.threads_per_worker,),
+                    )
+        return self._executor
+
+    def _retry_after(self):
+        # Caller holds the lock
+        completed = self.stats["completed"]
+        avg_run = self.stats["total_run"] / completed if completed else 5.0
+        return max(1, math.ceil(avg_run * self.pending / self.workers))
+
+    def _reserve(self):
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise OcrQueueFull(self._retry_after())
+            self.pending += 1
+
+    def _finish(self, submitted_at, future):
+        # Runs when the worker is done with the task, not when the awaiting request goes away
+        result = None
+        if not future.cancelled() and future.exception() is None:
+            result = future.result()
+        with self._lock:
+            self.pending -= 1
+            if result is None:
+                return
+            _, run_seconds, started_at = result
+            wait = max(0.0, started_at - submitted_at)
+            self.stats["completed"] += 1
+            self.stats["total_wait"] += wait
+            self.stats["max_wait"] = max(self.stats["max_wait"], wait)
+            self.stats["total_run"] += run_seconds
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in a worker process. Raises OcrQueueFull when the queue is saturated."""
+        self._reserve()
+        submitted_at = time.time()
+        try:
+            future = self._get_executor().submit(_timed_call, fn, args)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            raise
+        # A cancelled request stops waiting but the task keeps its worker, so it stays counted until it ends
+        future.add_done_callback(lambda done: self._finish(submitted_at, done))
+        result = await asyncio.wrap_future(future)
+        return result[0]
+
+    def warm_up(self):
+        """Start the worker processes (and their OCR readers) ahead of the first request."""
+        executor = self._get_executor()
+        for future in [executor.submit(time.sleep, 0) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self):
+        with self._lock:
+            completed = self.stats["completed"]
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self.pending,
+                "completed": completed,
+                "rejected": self.stats["rejected"],
+                "avg_wait_ms": round(self.stats["total_wait"] / completed * 1000, 1) if completed else 0.0,
+                "max_wait_ms": round(self.stats["max_wait"] * 1000, 1),
+                "avg_run_ms": round(self.stats["total_run"] / completed * 1000, 1) if completed else 0.0,
+            }
+
+
+ocr_pool = OcrProcessPool()
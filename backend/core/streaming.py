@@ -0,0 +1,15 @@
+import json as pyjson
+
+# Streamed responses are NDJSON (one JSON object per line) or server-sent events
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def format_stream_event(payload: dict, stream_format: str, event: str = None):
+    data = pyjson.dumps(payload, ensure_ascii=False)
+    if stream_format == "sse":
+        prefix = f"event: {event}\n" if event else ""
+        return f"{prefix}data: {data}\n\n"
+    return data + "\n"
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Enum as SqlEnum, Text
+from sqlalchemy import Column, Integer, String, Enum as SqlEnum, Text, DateTime, LargeBinary, Index
+from datetime import datetime
 from db.database import Base
 import enum
 
@@ -13,6 +14,12 @@ class LicenseEnum(str, enum.Enum):
     Teams = "Teams"
     Enterprise = "Enterprise"
 
+class JobStatusEnum(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -29,6 +36,14 @@ class SentimentLabel(Base):
     label = Column(String, nullable=False)              
     keywords = Column(String, nullable=False)          
         
+# Cached per-entry sentiment results keyed by a hash of the normalized entry text
+class SentimentResultCache(Base):
+    __tablename__ = "sentiment_result_cache"
+    text_hash = Column(String, primary_key=True, index=True)
+    label_signature = Column(String, nullable=False)   # SentimentLabel content the result was computed against
+    result = Column(Text, nullable=False)              # JSON-encoded SentimentOut
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
 # Image labels for image classification use case
 class ImageLabel(Base):
     __tablename__ = "image_labels"
@@ -37,6 +52,23 @@ class ImageLabel(Base):
     product_name = Column(String, nullable=False)       
     category = Column(String, nullable=False)           
 
+# Cached image classification results, keyed by exact bytes and by perceptual hash
+class ImageResultCache(Base):
+    __tablename__ = "image_result_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    byte_hash = Column(String, unique=True, index=True, nullable=False)
+    phash = Column(Integer, nullable=True)               # 64-bit dHash stored as a signed integer
+    result = Column(Text, nullable=False)                # JSON-encoded list of ImageLabelOut
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_hit_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    label_version = Column(Integer, nullable=True)       # image_labels version a DB-matched result was computed against
+
+# Change counters bumped on every edit of the named table (by triggers on SQLite), shared by all processes
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 # Translations for language translation use case
 class LanguageTranslation(Base):
     __tablename__ = "language_translations"
@@ -46,6 +78,21 @@ class LanguageTranslation(Base):
     input_text = Column(String, nullable=False)
     output_text = Column(String, nullable=False)
 
+# Segment-level translation memory: curated translations plus model output written back
+class TranslationMemory(Base):
+    __tablename__ = "translation_memory"
+    id = Column(Integer, primary_key=True, index=True)
+    input_lang = Column(String, nullable=False)
+    output_lang = Column(String, nullable=False)
+    segment_hash = Column(String, nullable=False)       # sha256 of the normalized source segment
+    source_text = Column(Text, nullable=False)
+    target_text = Column(Text, nullable=False)
+    origin = Column(String, nullable=False, default="model")   # "curated" (language_translations) or "model"
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    __table_args__ = (
+        Index("ix_translation_memory_lookup", "input_lang", "output_lang", "segment_hash", unique=True),
+    )
+
 # Products for agentic product search use case
 class ProductRecord(Base):
     __tablename__ = "products_agentic"
@@ -53,4 +100,22 @@ class ProductRecord(Base):
     name = Column(String, unique=True, nullable=False)
     category = Column(String, nullable=False)
     price = Column(String, nullable=False)
-    in_stock = Column(Integer, nullable=False)
\ No newline at end of file
+    in_stock = Column(Integer, nullable=False)
+
+# Background jobs for long-running use-case requests
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(String, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(SqlEnum(JobStatusEnum), nullable=False, index=True, default=JobStatusEnum.queued)
+    progress = Column(Integer, nullable=False, default=0)
+    user_id = Column(Integer, nullable=False, index=True)
+    params = Column(Text, nullable=True)                # JSON-encoded form/body fields
+    input_filename = Column(String, nullable=True)
+    input_blob = Column(LargeBinary, nullable=True)     # uploaded file, kept so jobs survive a restart
+    result = Column(Text, nullable=True)                # JSON-encoded result
+    error = Column(Text, nullable=True)
+    owner = Column(String, nullable=True)               # process running the job (host:pid:token)
+    lease_expires_at = Column(DateTime, nullable=True)  # renewed by the owner's heartbeat; expired = owner is gone
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -28,6 +28,15 @@ from service.langauge.translation_routes import router as translation_router
 from api.routes import router as routes_router
 from service.image.image_classification_routes import router as image_classification_router
 from service.agentic.agentic_product_search_routes import router as agentic_product_search_router
+from service.jobs.job_routes import router as job_router
+from service.jobs.job_manager import resume_pending_jobs
+from core.ocr import preload_readers
+from core.ocr_pool import ocr_pool
+from service.image.label_index import ensure_label_index
+from service.image.image_cache import ensure_label_version
+from service.sentiment.keyword_index import ensure_keyword_version
+from service.langauge.model_registry import translation_registry
+from service.langauge.translation_memory import import_curated_translations
 from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
 from auth.auth_manager import AuthManager
 
@@ -36,6 +45,9 @@ app = FastAPI()
 app.add_middleware(LoggingMiddleware)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 Base.metadata.create_all(bind=engine)
+ensure_label_index(engine)
+ensure_label_version(engine)
+ensure_keyword_version(engine)
 
 # JWT Auth
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
@@ -45,4 +57,26 @@ app.include_router(routes_router)
 app.include_router(sentiment_router)
 app.include_router(translation_router)
 app.include_router(image_classification_router)
-app.include_router(agentic_product_search_router)
\ No newline at end of file
+app.include_router(agentic_product_search_router)
+app.include_router(job_router)
+
+
+@app.on_event("startup")
+def startup():
+    # Load OCR readers once instead of on every request
+    preload_readers()
+    ocr_pool.warm_up()
+    # Configured translation pairs are resident before the first request
+    translation_registry.preload()
+    db = SessionLocal()
+    try:
+        import_curated_translations(db)
+    finally:
+        db.close()
+    # Pick up background jobs interrupted by a restart
+    resume_pending_jobs()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    ocr_pool.shutdown()
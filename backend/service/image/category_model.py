@@ -0,0 +1,222 @@
+"""Local food/beverage/other classifier over OCR text.
+
+Hashed word and character n-grams feed a softmax regression trained from ImageLabel rows
+plus the known brand list. It sits between the DB label match and the vision model: only
+OCR text it cannot classify confidently goes on to Groq.
+
+Retrain (writes IMAGE_CATEGORY_MODEL_PATH; running servers pick the new file up):
+    python -m service.image.category_model
+"""
+from datetime import datetime
+import argparse
+import os
+import random
+import re
+import threading
+import zlib
+import numpy as np
+
+IMAGE_CATEGORY_MODEL_PATH = os.getenv("IMAGE_CATEGORY_MODEL_PATH", "./models/image_category.npz")
+# Predictions below this probability fall through to the vision model; IMAGE_CATEGORY_LOCAL=0 disables the tier
+IMAGE_CATEGORY_MIN_CONFIDENCE = float(os.getenv("IMAGE_CATEGORY_MIN_CONFIDENCE", "0.8"))
+IMAGE_CATEGORY_LOCAL = os.getenv("IMAGE_CATEGORY_LOCAL", "1") != "0"
+# Share of the text's feature mass that must have been seen in training; unseen text is not guessed at
+IMAGE_CATEGORY_MIN_COVERAGE = float(os.getenv("IMAGE_CATEGORY_MIN_COVERAGE", "0.5"))
+N_FEATURES = 2 ** 16
+EPOCHS = 15
+LEARNING_RATE = 0.5
+L2 = 1e-5
+# Product name reported for a local prediction: the leading OCR words
+PRODUCT_NAME_WORDS = 5
+
+_TOKEN_RE = re.compile(r"[a-z0-9&']+")
+
+
+def tokenize(text: str):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def featurize(text: str, n_features=N_FEATURES):
+    """Sparse L2-normalised hashed features: (indices, values), indices unique."""
+    words = tokenize(text)
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    if not grams:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    # crc32 rather than hash(): Python's string hash is salted per process
+    hashed = np.fromiter((zlib.crc32(g.encode("utf-8")) % n_features for g in grams), dtype=np.int64, count=len(grams))
+    indices, counts = np.unique(hashed, return_counts=True)
+    values = (1.0 + np.log(counts)).astype(np.float32)
+    values /= np.linalg.norm(values)
+    return indices, values
+
+
+class CategoryModel:
+    """Softmax regression over hashed n-gram features."""
+
+    def __init__(self, classes, weights=None, bias=None, n_features=N_FEATURES, trained_at=None, samples=0):
+        self.classes = list(classes)
+        self.n_features = n_features
+        self.weights = weights if weights is not None else np.zeros((n_features, len(self.classes)), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(len(self.classes), dtype=np.float32)
+        self.trained_at = trained_at
+        self.samples = samples
+
+    def _probabilities(self, indices, values):
+        logits = values @ self.weights[indices] + self.bias
+        logits -= logits.max()
+        exp = np.exp(logits)
+        return exp / exp.sum()
+
+    def predict(self, text: str, min_coverage=IMAGE_CATEGORY_MIN_COVERAGE):
+        """Return (category, probability), or (None, 0.0) when too little of the text was seen in training."""
+        indices, values = featurize(text, self.n_features)
+        if not len(indices):
+            return None, 0.0
+        seen = np.any(self.weights[indices] != 0, axis=1)
+        if values[seen].sum() < min_coverage * values.sum():
+            return None, 0.0
+        probs = self._probabilities(indices, values)
+        best = int(np.argmax(probs))
+        return self.classes[best], float(probs[best])
+
+    def fit(self, samples, epochs=EPOCHS, learning_rate=LEARNING_RATE, l2=L2, seed=0):
+        """SGD over [(text, category), ...]; only the weight rows a sample touches are updated.
+
+        Samples are weighted inversely to their class frequency so a long brand list does not
+        push every uncertain prediction towards 'other'.
+        """
+        encoded = []
+        for text, category in samples:
+            indices, values = featurize(text, self.n_features)
+            if len(indices):
+                encoded.append((indices, values, self.classes.index(category)))
+        counts = np.bincount([target for _, _, target in encoded], minlength=len(self.classes))
+        class_weight = len(encoded) / (len(self.classes) * np.maximum(counts, 1))
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(encoded)
+            rate = learning_rate / (1.0 + 0.1 * epoch)
+            for indices, values, target in encoded:
+                grad = self._probabilities(indices, values)
+                grad[target] -= 1.0
+                grad *= class_weight[target]
+                rows = self.weights[indices]
+                self.weights[indices] = rows - rate * (np.outer(values, grad) + l2 * rows)
+                self.bias -= rate * grad
+        self.samples = len(encoded)
+        self.trained_at = datetime.utcnow().isoformat()
+        return self
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path, weights=self.weights, bias=self.bias, classes=np.array(self.classes),
+            n_features=self.n_features, trained_at=self.trained_at or "", samples=self.samples,
+        )
+        # Atomic swap so a serving process never loads a half-written file
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                classes=[str(c) for c in data["classes"]], weights=data["weights"], bias=data["bias"],
+                n_features=int(data["n_features"]), trained_at=str(data["trained_at"]) or None,
+                samples=int(data["samples"]),
+            )
+
+
+def training_samples(db, brands=()):
+    """(text, category) pairs from ImageLabel rows (OCR text and product name) plus brands as 'other'."""
+    from db.models import ImageLabel
+
+    samples = []
+    for label in db.query(ImageLabel).all():
+        category = label.category.strip().lower()
+        if label.ocr_text:
+            samples.append((label.ocr_text, category))
+        if label.product_name:
+            samples.append((label.product_name, category))
+    samples += [(brand, "other") for brand in brands]
+    return samples
+
+
+def train_category_model(db, brands=(), path=IMAGE_CATEGORY_MODEL_PATH, holdout=0.2, seed=0):
+    """Train on the current labels, score a holdout split, then refit on everything and save.
+
+    Returns (model, holdout metrics or None). ``accuracy`` is measured over the holdout samples
+    the model answered; ``answered`` is the share it did not decline for low coverage.
+    """
+    samples = training_samples(db, brands)
+    classes = sorted({category for _, category in samples})
+    if len(classes) < 2:
+        raise ValueError("Need labelled examples from at least two categories to train.")
+    shuffled = list(samples)
+    random.Random(seed).shuffle(shuffled)
+    split = int(len(shuffled) * (1 - holdout))
+    metrics = None
+    if holdout and 0 < split < len(shuffled):
+        model = CategoryModel(classes).fit(shuffled[:split], seed=seed)
+        test = shuffled[split:]
+        predictions = [(model.predict(text)[0], category) for text, category in test]
+        answered = [(predicted, category) for predicted, category in predictions if predicted is not None]
+        metrics = {
+            "accuracy": sum(1 for predicted, category in answered if predicted == category) / len(answered) if answered else 0.0,
+            "answered": len(answered) / len(test),
+        }
+    model = CategoryModel(classes).fit(samples, seed=seed)
+    model.save(path)
+    return model, metrics
+
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+
+def get_category_model(path=IMAGE_CATEGORY_MODEL_PATH):
+    """Return the persisted model (reloaded when the artifact changes), or None if not trained yet."""
+    global _model, _model_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if mtime != _model_mtime:
+        with _model_lock:
+            if mtime != _model_mtime:
+                try:
+                    _model = CategoryModel.load(path)
+                    print(f"[image] Loaded category model trained {_model.trained_at} on {_model.samples} samples")
+                except Exception as e:
+                    print(f"[image] Could not load category model {path}: {str(e)}")
+                    _model = None
+                _model_mtime = mtime
+    return _model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrain the local image category classifier.")
+    parser.add_argument("--output", default=IMAGE_CATEGORY_MODEL_PATH, help="Model artifact path (.npz)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of samples held out for the accuracy report")
+    args = parser.parse_args(argv)
+
+    from db.database import SessionLocal
+    from service.image.image_classification_service import KNOWN_BRANDS
+
+    db = SessionLocal()
+    try:
+        model, metrics = train_category_model(db, KNOWN_BRANDS, args.output, args.holdout)
+    finally:
+        db.close()
+    print(f"Trained on {model.samples} samples, classes {model.classes} -> {args.output}")
+    if metrics is not None:
+        print(f"Holdout accuracy: {metrics['accuracy']:.3f} on {metrics['answered']:.0%} of samples answered")
+
+
+if __name__ == "__main__":
+    main()
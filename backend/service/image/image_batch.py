@@ -0,0 +1,160 @@
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from api.schemas import ImageBatchItemOut
+from core.ocr_pool import ocr_pool, OcrQueueFull
+from service.image.image_classification_service import (
+    validate_image_bytes, lookup_cached_labels, store_cached_labels, match_ocr_text, classify_ocr_locally, aclassify_with_vision
+)
+from service.image.preprocess import decode_and_ocr, stage_stats
+import asyncio
+import functools
+import hashlib
+import os
+import zipfile
+
+# Batch classification: OCR runs concurrently in the OCR process pool, DB matching is done
+# once per distinct OCR text, and the vision model is only called for images with no match.
+IMAGE_BATCH_MAX_FILES = int(os.getenv("IMAGE_BATCH_MAX_FILES", "500"))
+IMAGE_BATCH_MAX_IMAGE_BYTES = int(os.getenv("IMAGE_BATCH_MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+# Images read/OCR'd at once; also bounds how many image payloads are held in memory
+IMAGE_BATCH_CONCURRENCY = int(os.getenv("IMAGE_BATCH_CONCURRENCY", str(ocr_pool.workers * 2)))
+IMAGE_BATCH_VISION_CONCURRENCY = int(os.getenv("IMAGE_BATCH_VISION_CONCURRENCY", "4"))
+OCR_QUEUE_RETRIES = 3
+IMAGE_CONTENT_TYPES = {"image/jpeg", "image/jpg", "image/png"}
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+IMAGE_TOO_LARGE = "Image exceeds the maximum allowed size."
+
+
+def _read_upload(file):
+    file.file.seek(0)
+    # Never more than one byte past the limit, even when the part's size was not known up front
+    image_bytes = file.file.read(IMAGE_BATCH_MAX_IMAGE_BYTES + 1)
+    if len(image_bytes) > IMAGE_BATCH_MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=400, detail=IMAGE_TOO_LARGE)
+    return image_bytes
+
+
+def iter_upload_sources(files):
+    """Yield (filename, reader, error) for multipart uploads; reader() returns the image bytes."""
+    for file in files:
+        content_type = (file.content_type or "").lower().strip()
+        if content_type not in IMAGE_CONTENT_TYPES:
+            yield file.filename, None, f"Invalid file type: '{content_type}'."
+        elif file.size is not None and file.size > IMAGE_BATCH_MAX_IMAGE_BYTES:
+            yield file.filename, None, IMAGE_TOO_LARGE
+        else:
+            yield file.filename, functools.partial(_read_upload, file), None
+
+
+def iter_zip_sources(fileobj):
+    """Yield (filename, reader, error) for the images in a ZIP; members are read on demand, not up front."""
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Uploaded archive is not a valid ZIP file.")
+    for info in archive.infolist():
+        name = info.filename
+        base = os.path.basename(name)
+        if info.is_dir() or not base or base.startswith(".") or name.startswith("__MACOSX/"):
+            continue
+        if not base.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        if info.file_size > IMAGE_BATCH_MAX_IMAGE_BYTES:
+            yield name, None, IMAGE_TOO_LARGE
+        else:
+            yield name, functools.partial(archive.read, info), None
+
+
+async def _ocr(image_bytes: bytes):
+    for attempt in range(OCR_QUEUE_RETRIES):
+        try:
+            return await ocr_pool.run(decode_and_ocr, image_bytes)
+        except OcrQueueFull as e:
+            # Other requests hold the queue; wait our turn instead of failing the whole batch
+            if attempt == OCR_QUEUE_RETRIES - 1:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+async def classify_batch(db: Session, sources):
+    """Classify every image from sources; returns ImageBatchItemOut in input order."""
+    items = []
+    pending = {}        # index -> (reader, cache key, ocr_text)
+    first_by_hash = {}  # sha256 -> index of the first image with those bytes
+    duplicates = {}     # index -> index of the identical earlier image
+    semaphore = asyncio.Semaphore(IMAGE_BATCH_CONCURRENCY)
+
+    async def prepare(index, reader):
+        async with semaphore:
+            item = items[index]
+            try:
+                image_bytes = await run_in_threadpool(reader)
+                validate_image_bytes(image_bytes)
+                digest = hashlib.sha256(image_bytes).hexdigest()
+                if digest in first_by_hash:
+                    duplicates[index] = first_by_hash[digest]
+                    return
+                first_by_hash[digest] = index
+                key, cached = await run_in_threadpool(lookup_cached_labels, image_bytes)
+                if cached is not None:
+                    item.results, item.source = cached, "cache"
+                    return
+                ocr_text, timings = await _ocr(image_bytes)
+                if ocr_text is None:
+                    item.error = "Uploaded file is not a valid image."
+                    return
+                stage_stats.record(timings)
+                pending[index] = (reader, key, ocr_text)
+            except OcrQueueFull:
+                item.error = "Image classification is busy, please retry shortly."
+            except HTTPException as e:
+                item.error = e.detail
+
+    # Readers are lazy, so the whole batch is listed and checked before any image is read
+    listed = []
+    for source in sources:
+        if len(listed) >= IMAGE_BATCH_MAX_FILES:
+            raise HTTPException(status_code=400, detail=f"Too many images; the limit is {IMAGE_BATCH_MAX_FILES}.")
+        listed.append(source)
+    if not listed:
+        raise HTTPException(status_code=400, detail="No images found in the upload.")
+    tasks = []
+    for index, (filename, reader, error) in enumerate(listed):
+        items.append(ImageBatchItemOut(index=index, filename=filename or f"image-{index}", error=error))
+        if reader is not None:
+            tasks.append(asyncio.create_task(prepare(index, reader)))
+    await asyncio.gather(*tasks)
+
+    # One DB lookup per distinct OCR text, on this request's session
+    texts = {" ".join(ocr_text.lower().split()) for _, _, ocr_text in pending.values()}
+    matches = await run_in_threadpool(lambda: {text: match_ocr_text(db, text) for text in texts})
+
+    vision_semaphore = asyncio.Semaphore(IMAGE_BATCH_VISION_CONCURRENCY)
+
+    async def resolve(index, reader, key, ocr_text):
+        item = items[index]
+        found = matches[" ".join(ocr_text.lower().split())]
+        local = [] if found else classify_ocr_locally(ocr_text)
+        if found:
+            item.results, item.source = found, "db"
+        elif local:
+            item.results, item.source = local, "local"
+        else:
+            async with vision_semaphore:
+                try:
+                    image_bytes = await run_in_threadpool(reader)
+                    item.results = await aclassify_with_vision(image_bytes)
+                    item.source = "vision"
+                except HTTPException as e:
+                    item.error = e.detail
+                    return
+        await run_in_threadpool(store_cached_labels, key, item.results, item.source == "db")
+
+    await asyncio.gather(*(resolve(index, *entry) for index, entry in pending.items()))
+
+    for index, original in duplicates.items():
+        items[index].results = items[original].results
+        items[index].source = items[original].source
+        items[index].error = items[original].error
+    return items
@@ -0,0 +1,277 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, text
+from db.database import SessionLocal, engine
+from db.models import ImageLabel, ImageResultCache, CacheVersion
+import hashlib
+import json as pyjson
+import numpy as np
+import cv2
+import os
+import threading
+import time
+
+# Image classification result cache: exact byte-hash fast path, then perceptual-hash (dHash)
+# nearest match within IMAGE_CACHE_MAX_DISTANCE bits, so re-encoded/resized uploads still hit.
+IMAGE_CACHE_ENABLED = os.getenv("IMAGE_CACHE_ENABLED", "1") != "0"
+IMAGE_CACHE_MAX_DISTANCE = int(os.getenv("IMAGE_CACHE_MAX_DISTANCE", "5"))
+IMAGE_CACHE_MAX_ENTRIES = int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "50000"))
+IMAGE_CACHE_TTL_SECONDS = int(os.getenv("IMAGE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+# How often a process reloads entries written by other processes
+IMAGE_CACHE_REFRESH_SECONDS = int(os.getenv("IMAGE_CACHE_REFRESH_SECONDS", "60"))
+# Expired and least recently hit rows are evicted every this many writes (or once the mirror is full)
+IMAGE_CACHE_EVICT_EVERY = int(os.getenv("IMAGE_CACHE_EVICT_EVERY", "200"))
+# Refreshes re-read this far back so rows committed slightly out of created_at order are not skipped
+_REFRESH_OVERLAP = timedelta(seconds=5)
+
+# Results matched from image_labels remember the labels' version; any insert/update/delete bumps it
+# (by trigger, so edits from other processes or plain SQL count too) and older entries stop matching.
+LABEL_VERSION_NAME = "image_labels"
+_VERSION_DDL = [
+    f"INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('{LABEL_VERSION_NAME}', 0)",
+] + [
+    f"CREATE TRIGGER IF NOT EXISTS image_labels_version_{suffix} AFTER {op} ON image_labels BEGIN "
+    f"UPDATE cache_versions SET version = version + 1 WHERE name = '{LABEL_VERSION_NAME}'; END"
+    for suffix, op in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+]
+
+_version_triggers = None
+_version_lock = threading.Lock()
+
+
+def ensure_label_version(bind=engine) -> bool:
+    """Create the label version row and its triggers (SQLite); returns False when edits are tracked by the ORM only."""
+    global _version_triggers
+    with _version_lock:
+        if _version_triggers is not None:
+            return _version_triggers
+        _version_triggers = False
+        if bind.dialect.name != "sqlite":
+            return False
+        with bind.begin() as conn:
+            columns = [row[1] for row in conn.execute(text("PRAGMA table_info(image_result_cache)"))]
+            if columns and "label_version" not in columns:
+                # Cache tables created before label versions existed
+                conn.execute(text("ALTER TABLE image_result_cache ADD COLUMN label_version INTEGER"))
+            for ddl in _VERSION_DDL:
+                conn.execute(text(ddl))
+        _version_triggers = True
+        return True
+
+
+def current_label_version():
+    ensure_label_version()
+    db = SessionLocal()
+    try:
+        row = db.query(CacheVersion.version).filter(CacheVersion.name == LABEL_VERSION_NAME).first()
+        return row[0] if row else 0
+    finally:
+        db.close()
+
+
+def _to_signed(value: int) -> int:
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def dhash(image_bytes: bytes):
+    """64-bit difference hash of the image, or None if it cannot be decoded."""
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    # A 1/8 grayscale decode is plenty for a 9x8 thumbnail and much cheaper than a full decode
+    gray = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        return None
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def fingerprint(image_bytes: bytes):
+    return hashlib.sha256(image_bytes).hexdigest(), dhash(image_bytes)
+
+
+class ImageResultCacheStore:
+    """In-process mirror of the image_result_cache table with Hamming-distance lookup."""
+
+    def __init__(self, max_distance=IMAGE_CACHE_MAX_DISTANCE, max_entries=IMAGE_CACHE_MAX_ENTRIES,
+                 ttl_seconds=IMAGE_CACHE_TTL_SECONDS, refresh_seconds=IMAGE_CACHE_REFRESH_SECONDS):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._entries = {}  # byte_hash -> (phash or None, result, created_at, label_version or None)
+        self._hash_keys = []
+        self._hash_values = np.zeros(0, dtype=np.uint64)
+        self._loaded_at = 0.0
+        self._loaded_until = None  # newest created_at merged from the table
+        self._writes_since_evict = 0
+        self.stats = {"exact_hits": 0, "near_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _rebuild_index(self):
+        # Caller holds the lock
+        keys = [k for k, v in self._entries.items() if v[0] is not None]
+        self._hash_keys = keys
+        self._hash_values = np.array([self._entries[k][0] for k in keys], dtype=np.uint64)
+
+    def _refresh(self):
+        """Merge rows written (by any process) since the last refresh; the query runs outside the lock."""
+        with self._lock:
+            if time.time() - self._loaded_at < self.refresh_seconds:
+                return
+            # Claimed up front so concurrent lookups do not refresh too; a failed refresh is retried next period
+            self._loaded_at = time.time()
+            since = self._loaded_until
+        db = SessionLocal()
+        try:
+            query = db.query(ImageResultCache)
+            if since is not None:
+                query = query.filter(ImageResultCache.created_at >= since - _REFRESH_OVERLAP)
+            loaded = {
+                row.byte_hash: (
+                    _to_unsigned(row.phash) if row.phash is not None else None,
+                    pyjson.loads(row.result),
+                    row.created_at,
+                    row.label_version,
+                )
+                for row in query.all()
+            }
+        finally:
+            db.close()
+        if not loaded:
+            return
+        with self._lock:
+            for byte_hash, entry in loaded.items():
+                current = self._entries.get(byte_hash)
+                # A store() that committed after the query ran is newer than what was read
+                if current is None or current[2] <= entry[2]:
+                    self._entries[byte_hash] = entry
+            newest = max(entry[2] for entry in loaded.values())
+            self._loaded_until = newest if since is None else max(since, newest)
+            self._rebuild_index()
+
+    def _touch(self, byte_hash):
+        db = SessionLocal()
+        try:
+            db.query(ImageResultCache).filter(ImageResultCache.byte_hash == byte_hash).update(
+                {ImageResultCache.last_hit_at: datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _is_fresh(self, entry, now, label_version):
+        _, _, created_at, entry_version = entry
+        return now - created_at <= self.ttl and (entry_version is None or entry_version == label_version)
+
+    def lookup(self, byte_hash: str, phash, label_version=None):
+        """Return the cached result list for an exact or near-duplicate image, else None.
+
+        Entries computed from image_labels only match while label_version is still current.
+        """
+        now = datetime.utcnow()
+        self._refresh()
+        with self._lock:
+            match = None
+            entry = self._entries.get(byte_hash)
+            if entry and self._is_fresh(entry, now, label_version):
+                match = byte_hash
+                self.stats["exact_hits"] += 1
+            elif phash is not None and len(self._hash_values):
+                xor = self._hash_values ^ np.uint64(phash)
+                distances = np.unpackbits(xor.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+                for best in np.argsort(distances, kind="stable"):
+                    if distances[best] > self.max_distance:
+                        break
+                    candidate = self._hash_keys[int(best)]
+                    if self._is_fresh(self._entries[candidate], now, label_version):
+                        match = candidate
+                        self.stats["near_hits"] += 1
+                        break
+            if match is None:
+                self.stats["misses"] += 1
+                return None
+            result = self._entries[match][1]
+        self._touch(match)
+        return result
+
+    def store(self, byte_hash: str, phash, result, label_version=None):
+        """Cache a result; pass label_version for results matched from image_labels."""
+        now = datetime.utcnow()
+        with self._lock:
+            self._writes_since_evict += 1
+            evict_due = self._writes_since_evict >= IMAGE_CACHE_EVICT_EVERY or len(self._entries) >= self.max_entries
+            if evict_due:
+                self._writes_since_evict = 0
+        db = SessionLocal()
+        try:
+            row = db.query(ImageResultCache).filter(ImageResultCache.byte_hash == byte_hash).first()
+            if row is None:
+                row = ImageResultCache(byte_hash=byte_hash)
+                db.add(row)
+            row.phash = _to_signed(phash) if phash is not None else None
+            row.result = pyjson.dumps(result)
+            row.label_version = label_version
+            row.created_at = now
+            row.last_hit_at = now
+            db.commit()
+            evicted = self._evict(db, now) if evict_due else []
+        finally:
+            db.close()
+        with self._lock:
+            self._entries[byte_hash] = (phash, result, now, label_version)
+            for key in evicted:
+                self._entries.pop(key, None)
+            if evict_due:
+                # Rows other processes evicted are never re-read, so expired ones are also dropped here
+                for key in [k for k, v in self._entries.items() if now - v[2] > self.ttl]:
+                    del self._entries[key]
+            self._rebuild_index()
+            self.stats["writes"] += 1
+            self.stats["evictions"] += len(evicted)
+
+    def _evict(self, db, now):
+        """Delete expired rows and the least recently hit rows beyond max_entries."""
+        expired = db.query(ImageResultCache.byte_hash).filter(ImageResultCache.created_at < now - self.ttl).all()
+        evicted = [h for (h,) in expired]
+        overflow = db.query(ImageResultCache).count() - len(evicted) - self.max_entries
+        if overflow > 0:
+            oldest = db.query(ImageResultCache.byte_hash).filter(
+                ImageResultCache.created_at >= now - self.ttl
+            ).order_by(ImageResultCache.last_hit_at).limit(overflow).all()
+            evicted += [h for (h,) in oldest]
+        if evicted:
+            db.query(ImageResultCache).filter(ImageResultCache.byte_hash.in_(evicted)).delete(synchronize_session=False)
+            db.commit()
+        return evicted
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["max_distance"] = self.max_distance
+        lookups = stats["exact_hits"] + stats["near_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["exact_hits"] + stats["near_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+image_cache = ImageResultCacheStore() if IMAGE_CACHE_ENABLED else None
+
+
+# Engines without the version triggers bump the counter from the ORM, in the same transaction
+@event.listens_for(ImageLabel, "after_insert")
+@event.listens_for(ImageLabel, "after_update")
+@event.listens_for(ImageLabel, "after_delete")
+def _on_image_label_change(mapper, connection, target):
+    if _version_triggers is False:
+        table = CacheVersion.__table__
+        updated = connection.execute(
+            table.update().where(table.c.name == LABEL_VERSION_NAME).values(version=table.c.version + 1)
+        )
+        if not updated.rowcount:
+            connection.execute(table.insert().values(name=LABEL_VERSION_NAME, version=1))
@@ -0,0 +1,201 @@
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from service.image.preprocess import decode_and_ocr, stage_stats
+from service.image.image_cache import image_cache, fingerprint, current_label_version
+from service.image.label_index import match_labels
+from service.image.category_model import (
+    get_category_model, tokenize, IMAGE_CATEGORY_LOCAL, IMAGE_CATEGORY_MIN_CONFIDENCE, PRODUCT_NAME_WORDS
+)
+from api.schemas import ImageLabelOut
+from core.llm_gateway import get_llm_gateway, LLMUnavailable
+import re
+import json as pyjson
+import base64
+
+VISION_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+MAX_RETRIES = 3
+
+VISION_PROMPT = (
+    "Analyze the image and classify the products accurately. "
+    "For each product, provide a JSON list with objects in the format: "
+    "[{product_name: ..., category: ...}]. "
+    "The category must be one of: 'food', 'beverage', or 'other'. "
+    "Choose only one category for each product. Do not use combined or ambiguous categories. "
+    "Use external knowledge and common sense to ensure logical consistency. "
+    "If you are unsure, use your best judgment and general world knowledge."
+)
+
+# List of known brands/restaurants to always categorize as 'other'
+KNOWN_BRANDS = {
+    "mcdonald's", "starbucks", "burger king", "kfc", "subway", "domino's", "pizza hut", "wendy's", "taco bell", "dunkin", "chipotle", "panera bread", "papa john's", "arbys", "jack in the box", "chick-fil-a", "five guys", "hardee's", "carls jr", "little caesars", "sonic", "a&w", "tim hortons", "jollibee", "in-n-out", "shake shack", "costa coffee", "pret a manger",
+    "krispy kreme", "peet's coffee", "cinnabon", "dairy queen", "el pollo loco", "wingstop", "red robin", "outback steakhouse", "buffalo wild wings", "panda express", "sbarro", "long john silver's", "baskin robbins", "dave & buster's", "ihop", "applebee's", "olive garden", "tgi friday's", "cheesecake factory", "benihana", "hooters", "ruby tuesday", "zaxby's", "raising cane's", "culver's", "bojangles", "jamba", "smoothie king", "firehouse subs", "jersey mike's", "potbelly", "blaze pizza", "mod pizza", "sweetgreen", "tropical smoothie cafe", "jimmy john's", "quiznos", "schlotzsky's", "togo's", "blimpie", "auntie anne's", "church's chicken", "denny's"
+}
+
+
+def validate_image_bytes(image_bytes: bytes):
+    # Sanity check: empty file 
+    if not image_bytes or image_bytes.strip() == b'string' or len(image_bytes) <= 7:
+        raise HTTPException(status_code=400, detail="Uploaded image is invalid or empty.")
+
+
+def lookup_cached_labels(image_bytes: bytes):
+    """Return (cache key, cached ImageLabelOut list or None) for an exact or near-duplicate image.
+
+    The key carries the image_labels version read before classification, so a label edit made
+    while the image is being classified still marks a DB-matched result as stale.
+    """
+    if image_cache is None:
+        return None, None
+    key = fingerprint(image_bytes) + (current_label_version(),)
+    cached = image_cache.lookup(*key)
+    if cached is None:
+        return key, None
+    return key, [ImageLabelOut(**item) for item in cached]
+
+
+def store_cached_labels(key, results, from_labels=False):
+    """Cache results; from_labels marks results matched from image_labels, which expire on label edits."""
+    if image_cache is not None and key is not None and results:
+        image_cache.store(key[0], key[1], [r.dict() for r in results], label_version=key[2] if from_labels else None)
+
+
+def classify_image(db: Session, image_bytes: bytes):
+    """OCR an uploaded image and match it against ImageLabel rows, falling back to the Groq vision model."""
+    validate_image_bytes(image_bytes)
+
+    key, cached = lookup_cached_labels(image_bytes)
+    if cached is not None:
+        return cached
+
+    # Decode + OCR in this process (the HTTP route uses the OCR process pool instead)
+    ocr_text, timings = decode_and_ocr(image_bytes)
+    stage_stats.record(timings)
+    if ocr_text is None:
+        raise HTTPException(status_code=400, detail="Uploaded file is not a valid image.")
+    print(f"OCR extracted text: '{ocr_text}'")
+    results = match_ocr_text(db, ocr_text)
+    from_labels = bool(results)
+    if not results:
+        results = classify_ocr_locally(ocr_text)
+    if not results:
+        results = classify_with_vision(image_bytes)
+    store_cached_labels(key, results, from_labels)
+    return results
+
+
+def match_ocr_text(db: Session, ocr_text: str):
+    """ImageLabel rows matching the OCR text, deduplicated by product name."""
+    unique = {}
+    if ocr_text:
+        words = [w for w in ocr_text.split() if len(w) > 2]
+        if words:
+            db_results = match_labels(db, words)
+            # Deduplicate by product_name
+            for r in db_results:
+                key = r.product_name.strip().lower()
+                if key not in unique:
+                    unique[key] = ImageLabelOut(product_name=r.product_name, category=r.category)
+
+    return list(unique.values())
+
+
+def classify_ocr_locally(ocr_text: str):
+    """Confident local category prediction for the OCR text, else an empty list.
+
+    Known brands are only training samples for the model; they do not short-circuit it.
+    """
+    if not IMAGE_CATEGORY_LOCAL or not ocr_text:
+        return []
+    model = get_category_model()
+    if model is None:
+        return []
+    category, confidence = model.predict(ocr_text)
+    if category is None or confidence < IMAGE_CATEGORY_MIN_CONFIDENCE:
+        print(f"Local category model unsure ({category}, {confidence:.2f}), escalating to vision model")
+        return []
+    product = " ".join(tokenize(ocr_text)[:PRODUCT_NAME_WORDS])
+    return [ImageLabelOut(product_name=product, category=category)]
+
+
+def _vision_messages(image_bytes: bytes):
+    base64_image = base64.b64encode(image_bytes).decode("utf-8")
+    image_path = f"data:image/jpeg;base64,{base64_image}"
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": VISION_PROMPT},
+                {"type": "image_url", "image_url": {"url": image_path}},
+            ],
+        }
+    ]
+
+
+def parse_vision_response(content: str):
+    """Turn the vision model's JSON list into deduplicated ImageLabelOut items."""
+    if not content:
+        print("Groq API returned empty content.")
+        raise HTTPException(status_code=500, detail="Empty content from vision model.")
+
+    match = re.search(r"\[.*?\]", content, re.DOTALL)
+    if not match:
+        print(f"Groq API response does not contain valid JSON: {content}")
+        raise HTTPException(status_code=500, detail="No valid JSON list found in model output.")
+
+    try:
+        parsed = pyjson.loads(match.group(0))
+    except pyjson.JSONDecodeError as e:
+        print(f"JSON parsing failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"JSON parse failed: {str(e)}")
+
+    if not isinstance(parsed, list):
+        print(f"Parsed result is not a list: {parsed}")
+        raise HTTPException(status_code=500, detail="Parsed result is not a list.")
+
+    # Deduplicate by product_name
+    unique = {}
+    for item in parsed:
+        product = item.get("product_name", "unknown").strip().lower()
+        category = item.get("category", "unknown").strip().lower()
+        if product == "string" or category == "string":
+            print(f"Skipping invalid product or category: {item}")
+            continue
+
+        # Override category for known brands/restaurants
+        if product in KNOWN_BRANDS:
+            category = "other"
+
+        if product not in unique:
+            unique[product] = ImageLabelOut(product_name=product, category=category)
+
+    if unique:
+        return list(unique.values())
+
+    print("No valid classification results found.")
+    raise HTTPException(status_code=500, detail="No valid classification results found.")
+
+
+async def aclassify_with_vision(image_bytes: bytes):
+    """Classify the raw image with the Groq vision model through the shared LLM gateway."""
+    gateway = get_llm_gateway()
+    messages = _vision_messages(image_bytes)
+    # Transport errors are retried with backoff by the gateway; this loop re-asks on unusable answers
+    for attempt in range(MAX_RETRIES):
+        try:
+            content = await gateway.acomplete(messages, model=VISION_MODEL)
+        except LLMUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            print(f"Vision model call failed: {str(e)}")
+            raise HTTPException(status_code=500, detail="Vision model failed after multiple attempts.")
+        try:
+            return parse_vision_response(content)
+        except HTTPException as e:
+            print(f"Attempt {attempt + 1} failed: {e.detail}")
+    print("Max retries reached. Falling back to default response.")
+    raise HTTPException(status_code=500, detail="Vision model failed after multiple attempts.")
+
+
+def classify_with_vision(image_bytes: bytes):
+    """Blocking variant of aclassify_with_vision for jobs and the batch CLI."""
+    return get_llm_gateway().run_sync(aclassify_with_vision(image_bytes))
@@ -0,0 +1,86 @@
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+from db.models import ImageLabel
+import os
+import threading
+
+# OCR-text lookup over image_labels. On SQLite an FTS5 table (external content, kept in sync
+# by triggers) gives BM25-ranked matches; other engines fall back to ILIKE with Python ranking.
+IMAGE_LABEL_TOP_K = int(os.getenv("IMAGE_LABEL_TOP_K", "20"))
+FTS_TABLE = "image_labels_fts"
+
+_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"ocr_text, content='image_labels', content_rowid='id', tokenize='unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS image_labels_fts_ai AFTER INSERT ON image_labels BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, ocr_text) VALUES (new.id, new.ocr_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS image_labels_fts_ad AFTER DELETE ON image_labels BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, ocr_text) VALUES ('delete', old.id, old.ocr_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS image_labels_fts_au AFTER UPDATE ON image_labels BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, ocr_text) VALUES ('delete', old.id, old.ocr_text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, ocr_text) VALUES (new.id, new.ocr_text); END",
+]
+
+_fts_available = None
+_fts_lock = threading.Lock()
+
+
+def ensure_label_index(engine) -> bool:
+    """Create the FTS5 table and sync triggers if missing; returns False when FTS5 is unavailable."""
+    global _fts_available
+    with _fts_lock:
+        if _fts_available is not None:
+            return _fts_available
+        if engine.dialect.name != "sqlite":
+            _fts_available = False
+            return False
+        try:
+            with engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+                ).first()
+                for ddl in _FTS_DDL:
+                    conn.execute(text(ddl))
+                if not exists:
+                    # Index the rows that were there before the table existed
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            _fts_available = True
+        except Exception as e:
+            print(f"[image] FTS5 unavailable, using LIKE matching: {e}")
+            _fts_available = False
+        return _fts_available
+
+
+def _fts_query(words):
+    # Quote each token so OCR punctuation is never parsed as FTS syntax; prefix match keeps
+    # partial OCR reads (e.g. "coca" vs "cocacola") matching like the old substring search.
+    return " OR ".join('"' + w.replace('"', '""') + '"*' for w in words)
+
+
+def match_labels(db: Session, words, top_k=IMAGE_LABEL_TOP_K):
+    """Return up to top_k ImageLabel rows matching the OCR words, best match first."""
+    words = list(dict.fromkeys(w.lower() for w in words if w.strip()))
+    if not words:
+        return []
+    if ensure_label_index(db.get_bind()):
+        rows = db.execute(
+            text(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :query "
+                f"ORDER BY bm25({FTS_TABLE}) LIMIT :limit"
+            ),
+            {"query": _fts_query(words), "limit": top_k},
+        ).fetchall()
+        ids = [row[0] for row in rows]
+        if not ids:
+            return []
+        labels = {label.id: label for label in db.query(ImageLabel).filter(ImageLabel.id.in_(ids)).all()}
+        return [labels[i] for i in ids if i in labels]
+
+    filters = [ImageLabel.ocr_text.ilike(f"%{word}%") for word in words]
+    candidates = db.query(ImageLabel).filter(or_(*filters)).all()
+
+    def matched(label):
+        haystack = label.ocr_text.lower()
+        return sum(1 for word in words if word in haystack)
+
+    return sorted(candidates, key=matched, reverse=True)[:top_k]
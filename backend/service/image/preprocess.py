@@ -0,0 +1,139 @@
+from PIL import Image
+from core.ocr import get_reader_pool
+import numpy as np
+import cv2
+import io
+import math
+import os
+import threading
+import time
+
+# Preprocessing applied between decode and OCR; OCR time grows with pixel count.
+# OCR_MAX_PIXELS=0 disables the pixel budget.
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", "2000000"))
+OCR_GRAYSCALE = os.getenv("OCR_GRAYSCALE", "1") == "1"
+OCR_CROP_TEXT = os.getenv("OCR_CROP_TEXT", "0") == "1"
+# Text-region crop is skipped when the detected region covers more than this share of the image
+CROP_MAX_COVERAGE = 0.9
+CROP_MARGIN = 0.02
+
+_DECODE_FLAGS = {
+    (1, False): cv2.IMREAD_COLOR, (1, True): cv2.IMREAD_GRAYSCALE,
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2, (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4, (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8, (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+def _image_size(image_bytes: bytes):
+    """Read width/height from the image header without decoding pixels."""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def _reduction_factor(width: int, height: int, max_pixels: int):
+    """Largest decoder scale factor (1/2/4/8) that still leaves at least max_pixels."""
+    factor = 1
+    if max_pixels and width * height > max_pixels:
+        for f in (2, 4, 8):
+            if (width // f) * (height // f) >= max_pixels:
+                factor = f
+    return factor
+
+
+def crop_text_region(img):
+    """Crop to the bounding box of high-gradient (text-like) regions; returns the image unchanged if unsure."""
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    height, width = gray.shape[:2]
+    grad = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, np.ones((3, 3), np.uint8))
+    _, bw = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    connected = cv2.morphologyEx(bw, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)))
+    contours, _ = cv2.findContours(connected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = 0.0005 * width * height
+    boxes = [cv2.boundingRect(c) for c in contours]
+    boxes = [(x, y, w, h) for x, y, w, h in boxes if w * h >= min_area and w >= 8 and h >= 8]
+    if not boxes:
+        return img
+    x0 = min(x for x, _, _, _ in boxes)
+    y0 = min(y for _, y, _, _ in boxes)
+    x1 = max(x + w for x, _, w, _ in boxes)
+    y1 = max(y + h for _, y, _, h in boxes)
+    mx, my = int(width * CROP_MARGIN), int(height * CROP_MARGIN)
+    x0, y0 = max(0, x0 - mx), max(0, y0 - my)
+    x1, y1 = min(width, x1 + mx), min(height, y1 + my)
+    if (x1 - x0) * (y1 - y0) > CROP_MAX_COVERAGE * width * height:
+        return img
+    return img[y0:y1, x0:x1]
+
+
+def decode_for_ocr(image_bytes: bytes, max_pixels=OCR_MAX_PIXELS, grayscale=OCR_GRAYSCALE, crop_text=OCR_CROP_TEXT):
+    """Decode within the pixel budget and apply grayscale/crop. Returns (image or None, timings)."""
+    timings = {}
+    start = time.perf_counter()
+    size = _image_size(image_bytes)
+    factor = _reduction_factor(size[0], size[1], max_pixels) if size else 1
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    img = cv2.imdecode(nparr, _DECODE_FLAGS[(factor, grayscale)])
+    timings["decode_ms"] = (time.perf_counter() - start) * 1000
+    if img is None:
+        return None, timings
+    timings["input_pixels"] = size[0] * size[1] if size else img.shape[0] * img.shape[1]
+
+    start = time.perf_counter()
+    height, width = img.shape[:2]
+    if max_pixels and height * width > max_pixels:
+        scale = math.sqrt(max_pixels / float(height * width))
+        img = cv2.resize(img, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+    if crop_text:
+        img = crop_text_region(img)
+    timings["preprocess_ms"] = (time.perf_counter() - start) * 1000
+    timings["ocr_pixels"] = img.shape[0] * img.shape[1]
+    return img, timings
+
+
+def decode_and_ocr(image_bytes: bytes, langs=("en",)):
+    """Decode, preprocess and OCR an image. Returns (ocr_text or None if undecodable, timings)."""
+    img, timings = decode_for_ocr(image_bytes)
+    if img is None:
+        return None, timings
+    start = time.perf_counter()
+    result = get_reader_pool(langs).readtext(img, detail=0)
+    timings["ocr_ms"] = (time.perf_counter() - start) * 1000
+    return " ".join(result).strip(), timings
+
+
+class StageStats:
+    """Running averages of the per-stage timings reported by decode_and_ocr."""
+
+    KEYS = ("decode_ms", "preprocess_ms", "ocr_ms", "input_pixels", "ocr_pixels")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.totals = {k: 0.0 for k in self.KEYS}
+
+    def record(self, timings: dict):
+        if "ocr_ms" not in timings:
+            return
+        with self._lock:
+            self.count += 1
+            for k in self.KEYS:
+                self.totals[k] += timings.get(k, 0.0)
+
+    def get_stats(self):
+        with self._lock:
+            stats = {
+                "images": self.count,
+                "max_pixels": OCR_MAX_PIXELS,
+                "grayscale": OCR_GRAYSCALE,
+                "crop_text": OCR_CROP_TEXT,
+            }
+            for k in self.KEYS:
+                stats[f"avg_{k}"] = round(self.totals[k] / self.count, 1) if self.count else 0.0
+            return stats
+
+
+stage_stats = StageStats()
@@ -0,0 +1 @@
+# Make jobs a Python package
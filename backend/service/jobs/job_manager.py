@@ -0,0 +1,263 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from sqlalchemy import inspect, or_, text
+from db.database import SessionLocal, engine
+from db.models import Job, JobStatusEnum
+from api.schemas import AgenticProductSearchIn
+from service.sentiment.keyword_index import get_keyword_index
+from service.sentiment.sentiment_pipeline import extract_feedback_content, iter_feedback_entries, score_entries
+from service.langauge.translation_service import extract_text_from_file, translate_text
+from service.image.image_classification_service import classify_image
+from service.agentic.agentic_product_search_service import validate_product_search, run_product_search
+from datetime import datetime, timedelta
+import json as pyjson
+import os
+import socket
+import threading
+import time
+import uuid
+
+# Number of jobs executed concurrently by this process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# A running job is owned by one process, which renews its lease every third of this period;
+# jobs whose lease lapsed (owner crashed or was killed) are requeued by any live process
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job-worker")
+    return _executor
+
+
+# Job handlers: (db, params, filename, blob, progress) -> JSON-serializable result
+
+def _run_sentiment(db: Session, params: dict, filename, blob, progress):
+    content = extract_feedback_content(filename, blob) if blob is not None else params.get("text_input") or ""
+    content = content.strip()
+    if not content:
+        raise HTTPException(status_code=400, detail="No text found in the document or input.")
+    total = sum(1 for _ in iter_feedback_entries(content))
+    keyword_index = get_keyword_index(db)
+    results = []
+    for index, _, result_obj in score_entries(iter_feedback_entries(content), keyword_index):
+        results.append(result_obj)
+        if (index + 1) % 100 == 0:
+            progress((index + 1) / total)
+    return results
+
+
+def _run_translation(db: Session, params: dict, filename, blob, progress):
+    text = (extract_text_from_file(filename, blob, pdf_strategy=params.get("pdf_strategy")) if blob is not None
+            else params.get("text_input") or "")
+    text = text.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="No text found in the document or input.")
+    progress(0.5)
+    translated_text = translate_text(db, params["input_lang"], params["output_lang"], text)
+    return {"translated_text": translated_text}
+
+
+def _run_image_classification(db: Session, params: dict, filename, blob, progress):
+    return jsonable_encoder(classify_image(db, blob))
+
+
+def _run_product_search(db: Session, params: dict, filename, blob, progress):
+    data = AgenticProductSearchIn(**params)
+    validate_product_search(data)
+    return jsonable_encoder(run_product_search(db, data))
+
+
+JOB_HANDLERS = {
+    "sentiment-analysis": _run_sentiment,
+    "language-translation": _run_translation,
+    "image-classification": _run_image_classification,
+    "agentic-product-search": _run_product_search,
+}
+
+
+def submit_job(db: Session, kind: str, user_id: int, params: dict = None, filename: str = None, blob: bytes = None) -> Job:
+    """Persist a new job and hand it to the worker pool."""
+    if kind not in JOB_HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Unknown job type: '{kind}'")
+    job = Job(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        status=JobStatusEnum.queued,
+        progress=0,
+        user_id=user_id,
+        params=pyjson.dumps(params or {}),
+        input_filename=filename,
+        input_blob=blob,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _get_executor().submit(run_job, job.id)
+    return job
+
+
+def _claim(db: Session, job_id: str) -> bool:
+    """Atomically move a queued job to running under this process's lease."""
+    claimed = db.query(Job).filter(
+        Job.id == job_id, Job.status == JobStatusEnum.queued
+    ).update({
+        Job.status: JobStatusEnum.running,
+        Job.owner: JOB_OWNER,
+        Job.lease_expires_at: datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS),
+    }, synchronize_session=False)
+    db.commit()
+    return bool(claimed)
+
+
+def run_job(job_id: str):
+    """Execute one job in a worker thread, recording progress, result or error in the database."""
+    db = SessionLocal()
+    try:
+        # Claim the job atomically so several processes resuming the same queue never run it twice
+        if not _claim(db, job_id):
+            return
+        _start_heartbeat()
+        job = db.query(Job).filter(Job.id == job_id).first()
+
+        def progress(fraction: float):
+            job.progress = max(0, min(99, int(fraction * 100)))
+            db.commit()
+
+        try:
+            params = pyjson.loads(job.params or "{}")
+            result = JOB_HANDLERS[job.kind](db, params, job.input_filename, job.input_blob, progress)
+        except HTTPException as e:
+            db.rollback()
+            job.status = JobStatusEnum.failed
+            job.error = str(e.detail)
+        except Exception as e:
+            db.rollback()
+            job.status = JobStatusEnum.failed
+            job.error = str(e)
+        else:
+            job.status = JobStatusEnum.succeeded
+            job.progress = 100
+            job.result = pyjson.dumps(result, ensure_ascii=False)
+            # The upload is no longer needed once the job has a result
+            job.input_blob = None
+        job.owner = None
+        job.lease_expires_at = None
+        db.commit()
+        print(f"[jobs] Job {job_id} ({job.kind}) finished with status {job.status.value}")
+    except Exception as e:
+        # Anything failing outside the handler (loading the job, saving the result) must not leave it running
+        print(f"[jobs] Job {job_id} failed while being run: {str(e)}")
+        _record_failure(job_id, str(e))
+    finally:
+        db.close()
+
+
+def _record_failure(job_id: str, error: str):
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id == job_id, Job.owner == JOB_OWNER).update({
+            Job.status: JobStatusEnum.failed, Job.error: error, Job.owner: None, Job.lease_expires_at: None,
+        }, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        print(f"[jobs] Could not record failure of job {job_id}: {str(e)}")
+    finally:
+        db.close()
+
+
+def _renew_leases(db: Session):
+    db.query(Job).filter(Job.owner == JOB_OWNER, Job.status == JobStatusEnum.running).update(
+        {Job.lease_expires_at: datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)}, synchronize_session=False
+    )
+    db.commit()
+
+
+def _requeue_expired(db: Session):
+    """Requeue running jobs whose owner stopped renewing its lease; returns their ids."""
+    now = datetime.utcnow()
+    expired = [job_id for (job_id,) in db.query(Job.id).filter(
+        Job.status == JobStatusEnum.running,
+        or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now),
+    ).all()]
+    requeued = []
+    for job_id in expired:
+        # Conditional on the lease still being expired, so a live owner that just renewed keeps its job
+        updated = db.query(Job).filter(
+            Job.id == job_id, Job.status == JobStatusEnum.running,
+            or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now),
+        ).update({Job.status: JobStatusEnum.queued, Job.owner: None, Job.lease_expires_at: None},
+                 synchronize_session=False)
+        if updated:
+            requeued.append(job_id)
+    db.commit()
+    return requeued
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_LEASE_SECONDS / 3)
+        db = SessionLocal()
+        try:
+            _renew_leases(db)
+            requeued = _requeue_expired(db)
+            for job_id in requeued:
+                _get_executor().submit(run_job, job_id)
+            if requeued:
+                print(f"[jobs] Requeued {len(requeued)} job(s) with expired leases")
+        except Exception as e:
+            print(f"[jobs] Heartbeat failed: {str(e)}")
+        finally:
+            db.close()
+
+
+_heartbeat_started = False
+
+
+def _start_heartbeat():
+    """Renew this process's leases and reclaim expired ones in the background (one thread per process)."""
+    global _heartbeat_started
+    if _heartbeat_started:
+        return
+    with _executor_lock:
+        if not _heartbeat_started:
+            threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True).start()
+            _heartbeat_started = True
+
+
+def _ensure_lease_columns():
+    # Job tables created before leases existed
+    with engine.begin() as conn:
+        columns = {column["name"] for column in inspect(conn).get_columns("jobs")}
+        if "owner" not in columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN owner VARCHAR"))
+        if "lease_expires_at" not in columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN lease_expires_at DATETIME"))
+
+
+def resume_pending_jobs():
+    """Pick up queued jobs and jobs whose owning process died (called at startup).
+
+    Running jobs with a live lease belong to another worker process and are left alone.
+    """
+    _ensure_lease_columns()
+    db = SessionLocal()
+    try:
+        requeued = _requeue_expired(db)
+        queued = [job_id for (job_id,) in db.query(Job.id).filter(Job.status == JobStatusEnum.queued).all()]
+        for job_id in queued:
+            _get_executor().submit(run_job, job_id)
+        if queued:
+            print(f"[jobs] Resumed {len(queued)} pending job(s), {len(requeued)} from expired leases")
+    finally:
+        db.close()
+    _start_heartbeat()
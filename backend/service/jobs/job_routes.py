@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File, Body
+from sqlalchemy.orm import Session
+from db.models import RoleEnum, LicenseEnum, User, Job, JobStatusEnum
+from db.database import get_db
+from auth.auth_manager import AuthManager
+from api.schemas import JobSubmitOut, JobOut, JobResultOut, AgenticProductSearchIn
+from service.jobs.job_manager import submit_job
+from service.langauge.translation_service import resolve_pdf_strategy
+from service.agentic.agentic_product_search_service import validate_product_search
+from fastapi.encoders import jsonable_encoder
+import json as pyjson
+
+router = APIRouter()
+
+
+async def _read_upload(file: UploadFile):
+    if file is None or not getattr(file, "filename", None) or not file.filename.strip():
+        return None, None
+    contents = await file.read()
+    if not contents:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    return file.filename, contents
+
+
+def _require_single_input(text_input: str, filename):
+    has_text = text_input is not None and text_input.strip() != ""
+    if (has_text and filename) or (not has_text and not filename):
+        raise HTTPException(
+            status_code=400,
+            detail="Please provide either text input or a file, but not both."
+        )
+
+
+@router.post("/jobs/sentiment-analysis", response_model=JobSubmitOut)
+@AuthManager.check_access([RoleEnum.Viewer], [LicenseEnum.Teams])
+async def submit_sentiment_job(
+    text_input: str = Form(None),
+    file: UploadFile = File(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(AuthManager.get_current_user)
+):
+    filename, contents = await _read_upload(file)
+    _require_single_input(text_input, filename)
+    job = submit_job(db, "sentiment-analysis", current_user.id, {"text_input": text_input}, filename, contents)
+    return {"job_id": job.id, "status": job.status.value}
+
+
+@router.post("/jobs/language-translation", response_model=JobSubmitOut)
+@AuthManager.check_access([RoleEnum.Editor], [LicenseEnum.Enterprise])
+async def submit_translation_job(
+    input_lang: str = Form(...),
+    output_lang: str = Form(...),
+    text_input: str = Form(None),
+    file: UploadFile = File(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(AuthManager.get_current_user),
+    pdf_strategy: str = Form(None)
+):
+    filename, contents = await _read_upload(file)
+    _require_single_input(text_input, filename)
+    params = {"input_lang": input_lang, "output_lang": output_lang, "text_input": text_input,
+              "pdf_strategy": resolve_pdf_strategy(pdf_strategy)}
+    job = submit_job(db, "language-translation", current_user.id, params, filename, contents)
+    return {"job_id": job.id, "status": job.status.value}
+
+
+@router.post("/jobs/image-classification", response_model=JobSubmitOut)
+@AuthManager.check_access([RoleEnum.Admin], [LicenseEnum.Teams])
+async def submit_image_classification_job(
+    file: UploadFile = File(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(AuthManager.get_current_user)
+):
+    if not file:
+        raise HTTPException(status_code=400, detail="No file uploaded. Please upload a valid .jpg or .png image.")
+    content_type = (file.content_type or "").lower().strip()
+    if content_type not in {"image/jpeg", "image/jpg", "image/png"}:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type: '{content_type}'. Please upload a valid .jpg or .png image."
+        )
+    filename, contents = await _read_upload(file)
+    job = submit_job(db, "image-classification", current_user.id, {}, filename, contents)
+    return {"job_id": job.id, "status": job.status.value}
+
+
+@router.post("/jobs/agentic-product-search", response_model=JobSubmitOut)
+@AuthManager.check_access([RoleEnum.Admin], [LicenseEnum.Basic])
+async def submit_product_search_job(
+    data: AgenticProductSearchIn = Body(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(AuthManager.get_current_user)
+):
+    validate_product_search(data)
+    job = submit_job(db, "agentic-product-search", current_user.id, jsonable_encoder(data))
+    return {"job_id": job.id, "status": job.status.value}
+
+
+def _get_own_job(db: Session, job_id: str, current_user: User) -> Job:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+def get_job_status(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(AuthManager.get_current_user)
+):
+    return _get_own_job(db, job_id, current_user)
+
+
+@router.get("/jobs/{job_id}/result", response_model=JobResultOut)
+def get_job_result(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(AuthManager.get_current_user)
+):
+    job = _get_own_job(db, job_id, current_user)
+    if job.status == JobStatusEnum.failed:
+        raise HTTPException(status_code=500, detail=f"Job failed: {job.error}")
+    if job.status != JobStatusEnum.succeeded:
+        raise HTTPException(status_code=409, detail=f"Job is not finished yet (status: {job.status.value}, progress: {job.progress}%)")
+    return {"id": job.id, "kind": job.kind, "status": job.status.value, "result": pyjson.loads(job.result)}
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from service.langauge.translation_backends import load_translator, TRANSLATION_BACKEND
+import gc
+import os
+import threading
+import time
+
+# MarianMT pipelines are ~300 MB each, so they are loaded once and kept resident up to a memory
+# budget, evicting the least recently used pair when a new one does not fit.
+# TRANSLATION_PRELOAD_PAIRS: pairs loaded at startup, e.g. "en-fr,en-de"
+TRANSLATION_MODEL_TEMPLATE = os.getenv("TRANSLATION_MODEL_TEMPLATE", "Helsinki-NLP/opus-mt-{src}-{tgt}")
+TRANSLATION_PRELOAD_PAIRS = [p.strip().lower() for p in os.getenv("TRANSLATION_PRELOAD_PAIRS", "").split(",") if p.strip()]
+TRANSLATION_MEMORY_BUDGET_MB = int(os.getenv("TRANSLATION_MEMORY_BUDGET_MB", "2048"))
+
+
+def _pair_key(src: str, tgt: str) -> str:
+    return f"{src.strip().lower()}-{tgt.strip().lower()}"
+
+
+def _model_bytes(translator) -> int:
+    """Bytes held by the pipeline model's parameters and buffers (artifact size for converted backends)."""
+    if getattr(translator, "model_bytes", None) is not None:
+        return translator.model_bytes
+    model = getattr(translator, "model", None)
+    if model is None or not hasattr(model, "parameters"):
+        return 0
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class TranslationModelRegistry:
+    """LRU cache of translation pipelines bounded by resident model memory."""
+
+    def __init__(self, budget_mb=TRANSLATION_MEMORY_BUDGET_MB, model_template=TRANSLATION_MODEL_TEMPLATE, loader=None,
+                 backend=TRANSLATION_BACKEND):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.model_template = model_template
+        self.backend = backend
+        self._loader = loader or self._load_pipeline
+        self._models = OrderedDict()  # pair -> (pipeline, bytes), least recently used first
+        self._loading = {}            # pair -> Future shared by concurrent requests for the same pair
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def _load_pipeline(self, pair: str):
+        src, tgt = pair.split("-", 1)
+        return load_translator(self.model_template.format(src=src, tgt=tgt), self.backend)
+
+    def _pair_stats(self, pair: str):
+        # Caller holds the lock
+        if pair not in self.stats:
+            self.stats[pair] = {"hits": 0, "misses": 0, "loads": 0, "load_failures": 0,
+                                "last_load_seconds": None, "total_load_seconds": 0.0, "evictions": 0}
+        return self.stats[pair]
+
+    def get(self, src: str, tgt: str):
+        """Return the pipeline for src->tgt, loading it (once, even under concurrency) if not resident."""
+        pair = _pair_key(src, tgt)
+        with self._lock:
+            stats = self._pair_stats(pair)
+            if pair in self._models:
+                self._models.move_to_end(pair)
+                stats["hits"] += 1
+                return self._models[pair][0]
+            stats["misses"] += 1
+            future = self._loading.get(pair)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._loading[pair] = future
+        if not owner:
+            return future.result()
+
+        start = time.time()
+        try:
+            translator = self._loader(pair)
+        except Exception as e:
+            with self._lock:
+                self._pair_stats(pair)["load_failures"] += 1
+                del self._loading[pair]
+            future.set_exception(e)
+            raise
+        elapsed = time.time() - start
+        size = _model_bytes(translator)
+        with self._lock:
+            stats = self._pair_stats(pair)
+            stats["loads"] += 1
+            stats["last_load_seconds"] = round(elapsed, 2)
+            stats["total_load_seconds"] += elapsed
+            self._models[pair] = (translator, size)
+            evicted = self._evict_over_budget(keep=pair)
+            del self._loading[pair]
+        future.set_result(translator)
+        print(f"[translation] Loaded {pair} ({size / 1024 / 1024:.0f} MB) in {elapsed:.2f}s"
+              + (f", evicted {evicted}" if evicted else ""))
+        if evicted:
+            gc.collect()
+        return translator
+
+    def _evict_over_budget(self, keep: str):
+        # Caller holds the lock. Requests already holding an evicted pipeline finish with it normally.
+        evicted = []
+        while self._resident_bytes() > self.budget_bytes:
+            pair = next((p for p in self._models if p != keep), None)
+            if pair is None:
+                break
+            del self._models[pair]
+            self._pair_stats(pair)["evictions"] += 1
+            evicted.append(pair)
+        return evicted
+
+    def _resident_bytes(self):
+        return sum(size for _, size in self._models.values())
+
+    def preload(self, pairs=None):
+        """Load the configured pairs up front (called at startup); failures are logged, not raised."""
+        for pair in (pairs if pairs is not None else TRANSLATION_PRELOAD_PAIRS):
+            src, _, tgt = pair.partition("-")
+            try:
+                self.get(src, tgt)
+            except Exception as e:
+                print(f"[translation] Could not preload {pair}: {str(e)}")
+
+    def get_stats(self):
+        with self._lock:
+            pairs = {}
+            for pair, stats in self.stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                entry = dict(stats)
+                entry["total_load_seconds"] = round(stats["total_load_seconds"], 2)
+                entry["resident"] = pair in self._models
+                entry["resident_mb"] = round(self._models[pair][1] / 1024 / 1024, 1) if pair in self._models else 0.0
+                entry["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+                pairs[pair] = entry
+            return {
+                "backend": self.backend,
+                "budget_mb": round(self.budget_bytes / 1024 / 1024),
+                "resident_mb": round(self._resident_bytes() / 1024 / 1024, 1),
+                "resident_pairs": list(self._models),
+                "pairs": pairs,
+            }
+
+
+translation_registry = TranslationModelRegistry()
@@ -0,0 +1,58 @@
+import re
+
+# Paragraphs are separated by blank lines; single line breaks inside a paragraph (PDF line
+# wrapping) are treated as spaces so sentences are not cut at the end of each line.
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?。！？])\s+")
+
+
+def split_paragraphs(text: str):
+    """Non-empty paragraphs of text, with internal whitespace collapsed."""
+    paragraphs = []
+    for block in _PARAGRAPH_RE.split(text):
+        paragraph = " ".join(block.split())
+        if paragraph:
+            paragraphs.append(paragraph)
+    return paragraphs
+
+
+def split_sentences(paragraph: str):
+    return [s for s in _SENTENCE_RE.split(paragraph) if s.strip()]
+
+
+def _split_long_sentence(sentence: str, count_tokens, max_tokens: int):
+    """Split a sentence that alone exceeds the budget at word boundaries."""
+    pieces = []
+    current = []
+    for word in sentence.split():
+        candidate = " ".join(current + [word])
+        if current and count_tokens([candidate])[0] > max_tokens:
+            pieces.append(" ".join(current))
+            current = [word]
+        else:
+            current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def fit_segments(segments, count_tokens, max_tokens: int):
+    """Split any segment over max_tokens at word boundaries.
+
+    Returns (pieces, owners): the model inputs and, for each, the index of the segment it came from.
+    count_tokens takes a list of strings and returns their token counts.
+    """
+    pieces = []
+    owners = []
+    for index, (segment, tokens) in enumerate(zip(segments, count_tokens(segments))):
+        parts = _split_long_sentence(segment, count_tokens, max_tokens) if tokens > max_tokens else [segment]
+        pieces.extend(parts)
+        owners.extend([index] * len(parts))
+    return pieces, owners
+
+
+def tokenizer_counter(tokenizer):
+    """count_tokens function backed by a Hugging Face tokenizer (batched, no special tokens)."""
+    def count_tokens(texts):
+        return [len(ids) for ids in tokenizer(list(texts), add_special_tokens=False)["input_ids"]]
+    return count_tokens
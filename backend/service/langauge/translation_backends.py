@@ -0,0 +1,290 @@
+"""Inference backends for MarianMT translation models.
+
+TRANSLATION_BACKEND selects how the model registry loads a pair:
+    torch      stock PyTorch fp32 (default)
+    int8       PyTorch with dynamically quantized int8 Linear layers
+    onnx       ONNX Runtime on the exported model (needs optimum[onnxruntime])
+    onnx-int8  ONNX Runtime on the exported model with int8 dynamically quantized weights
+
+Converted models live under TRANSLATION_ARTIFACT_DIR and are never built on the request path.
+Build them ahead of time and check them against the fp32 output with:
+    python -m service.langauge.translation_backends convert en-fr de-en --backend onnx-int8
+    python -m service.langauge.translation_backends validate en-fr --backend onnx-int8
+Only an artifact with a passing validation report for that exact build is served; otherwise the
+pair falls back to torch.
+Compare throughput and memory with benchmarks/translation_bench.py.
+"""
+from datetime import datetime
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+from transformers import pipeline
+import argparse
+import json as pyjson
+import os
+import shutil
+import sys
+import tempfile
+
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "torch").strip().lower()
+TRANSLATION_ARTIFACT_DIR = os.getenv("TRANSLATION_ARTIFACT_DIR", "./models/translation")
+# Mean word-level similarity to the fp32 output a converted model needs to pass validation
+TRANSLATION_VALIDATION_MIN_SIMILARITY = float(os.getenv("TRANSLATION_VALIDATION_MIN_SIMILARITY", "0.9"))
+# ONNX Runtime quantization target: "avx2", "avx512", "avx512_vnni" or "arm64"
+TRANSLATION_ONNX_QUANT_ARCH = os.getenv("TRANSLATION_ONNX_QUANT_ARCH", "avx2")
+
+TORCH_INT8_FILE = "model_int8.pt"
+ARTIFACT_FILE = "artifact.json"
+VALIDATION_FILE = "validation.json"
+
+# Used for validation/benchmarks when a pair has no curated or remembered English source text
+DEFAULT_SAMPLES = [
+    "Thank you for your order.",
+    "Your package will arrive within three business days.",
+    "Please contact our support team if you have any questions about your invoice.",
+    "The meeting has been moved to Thursday afternoon.",
+    "We were unable to process your payment because the card has expired.",
+    "This product contains nuts and may not be suitable for people with allergies.",
+    "The new version improves performance and fixes several security issues reported by customers.",
+    "Store the medicine in a cool, dry place out of reach of children.",
+]
+
+
+def artifact_path(model_name: str, backend: str) -> str:
+    return os.path.join(TRANSLATION_ARTIFACT_DIR, backend, model_name.replace("/", "--"))
+
+
+def _read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return pyjson.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        pyjson.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _dir_bytes(path: str, suffixes) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path) if name.endswith(suffixes))
+
+
+@contextmanager
+def _conversion_lock(path: str):
+    """Serialize conversions of one artifact across processes (advisory lock next to the artifact)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "w") as lock_file:
+        try:
+            import fcntl
+        except ImportError:
+            # No flock on this platform: conversions are a CLI step, run them one at a time
+            yield
+            return
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _require_optimum():
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    except ImportError:
+        raise RuntimeError("optimum[onnxruntime] is not installed; it is required for the onnx backends.")
+    return ORTModelForSeq2SeqLM, ORTQuantizer, AutoQuantizationConfig
+
+
+def _export_torch_int8(model_name: str, out_dir: str):
+    import torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    torch.save(model, os.path.join(out_dir, TORCH_INT8_FILE))
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+
+
+def _export_onnx(model_name: str, out_dir: str):
+    from transformers import AutoTokenizer
+    ORTModelForSeq2SeqLM, _, _ = _require_optimum()
+    ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True).save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+
+
+def _export_onnx_int8(model_name: str, out_dir: str):
+    _, ORTQuantizer, AutoQuantizationConfig = _require_optimum()
+    onnx_dir = convert_model(model_name, "onnx")
+    qconfig = getattr(AutoQuantizationConfig, TRANSLATION_ONNX_QUANT_ARCH)(is_static=False, per_channel=False)
+    # Same layout as the fp32 export (config, tokenizer, file names), with each graph's weights quantized
+    shutil.copytree(onnx_dir, out_dir, dirs_exist_ok=True)
+    for name in os.listdir(onnx_dir):
+        if name.endswith(".onnx"):
+            ORTQuantizer.from_pretrained(onnx_dir, file_name=name).quantize(save_dir=out_dir, quantization_config=qconfig)
+            os.replace(os.path.join(out_dir, name[:-len(".onnx")] + "_quantized.onnx"), os.path.join(out_dir, name))
+    for name in (ARTIFACT_FILE, VALIDATION_FILE):
+        if os.path.exists(os.path.join(out_dir, name)):
+            os.remove(os.path.join(out_dir, name))
+
+
+_EXPORTERS = {"int8": _export_torch_int8, "onnx": _export_onnx, "onnx-int8": _export_onnx_int8}
+
+
+def convert_model(model_name: str, backend: str, force=False) -> str:
+    """Build (or reuse) the cached artifact for model_name under backend; returns its directory."""
+    if backend not in _EXPORTERS:
+        raise ValueError(f"Backend '{backend}' has no conversion step; choose one of {', '.join(_EXPORTERS)}.")
+    path = artifact_path(model_name, backend)
+    with _conversion_lock(path):
+        # Checked again under the lock: another process may have just finished the same conversion
+        if not force and os.path.exists(os.path.join(path, ARTIFACT_FILE)):
+            return path
+        # Private build directory on the same filesystem so the final swap is a rename
+        tmp_path = tempfile.mkdtemp(prefix=os.path.basename(path) + ".", dir=os.path.dirname(path))
+        start = datetime.utcnow()
+        try:
+            _EXPORTERS[backend](model_name, tmp_path)
+            _write_json(os.path.join(tmp_path, ARTIFACT_FILE), {
+                "model": model_name, "backend": backend, "created_at": start.isoformat(),
+                "convert_seconds": round((datetime.utcnow() - start).total_seconds(), 2),
+                "size_bytes": _dir_bytes(tmp_path, (".onnx", ".pt")),
+            })
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    print(f"[translation] Converted {model_name} to {backend} in {path}")
+    return path
+
+
+def _load_artifact(model_name: str, backend: str):
+    from transformers import AutoTokenizer
+    path = artifact_path(model_name, backend)
+    if not os.path.exists(os.path.join(path, ARTIFACT_FILE)):
+        raise RuntimeError(f"no {backend} artifact in {path}; run the convert command first")
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    if backend == "int8":
+        import torch
+        model = torch.load(os.path.join(path, TORCH_INT8_FILE), weights_only=False)
+    else:
+        ORTModelForSeq2SeqLM, _, _ = _require_optimum()
+        model = ORTModelForSeq2SeqLM.from_pretrained(path)
+    translator = pipeline("translation", model=model, tokenizer=tokenizer)
+    # Quantized/ONNX weights are not torch parameters; the registry budgets on the artifact size instead
+    translator.model_bytes = _dir_bytes(path, (".onnx", ".pt"))
+    return translator
+
+
+def load_translator(model_name: str, backend=TRANSLATION_BACKEND):
+    """Translation pipeline for model_name on backend, falling back to torch fp32 unless a validated artifact exists."""
+    if backend != "torch":
+        path = artifact_path(model_name, backend)
+        artifact = _read_json(os.path.join(path, ARTIFACT_FILE))
+        validation = _read_json(os.path.join(path, VALIDATION_FILE))
+        if artifact is None or validation is None:
+            print(f"[translation] no validated {backend} artifact for {model_name}, using torch")
+        elif not validation.get("passed") or validation.get("artifact_created_at") != artifact.get("created_at"):
+            # A failed report, or one written for an earlier build of the artifact
+            print(f"[translation] {backend} artifact for {model_name} did not pass validation, using torch")
+        else:
+            try:
+                return _load_artifact(model_name, backend)
+            except Exception as e:
+                print(f"[translation] {backend} backend unavailable for {model_name}, using torch: {str(e)}")
+    return pipeline("translation", model=model_name)
+
+
+def similarity(reference: str, candidate: str) -> float:
+    """Word-level similarity in [0, 1] between two translations."""
+    return SequenceMatcher(None, reference.split(), candidate.split()).ratio()
+
+
+def validate_backend(model_name: str, backend: str, samples, min_similarity=TRANSLATION_VALIDATION_MIN_SIMILARITY):
+    """Translate samples with fp32 and the converted model, compare them and record the result next to the artifact."""
+    from service.langauge.translation_service import translate_segments
+
+    artifact = _read_json(os.path.join(artifact_path(model_name, backend), ARTIFACT_FILE)) or {}
+    reference = translate_segments(pipeline("translation", model=model_name), samples)
+    candidate = translate_segments(_load_artifact(model_name, backend), samples)
+    scores = [similarity(r, c) for r, c in zip(reference, candidate)]
+    worst = sorted(zip(scores, samples, reference, candidate))[:3]
+    report = {
+        "model": model_name,
+        "backend": backend,
+        "artifact_created_at": artifact.get("created_at"),
+        "samples": len(samples),
+        "exact_match": round(sum(1 for r, c in zip(reference, candidate) if r.strip() == c.strip()) / len(samples), 4),
+        "mean_similarity": round(sum(scores) / len(scores), 4),
+        "min_similarity": round(min(scores), 4),
+        "threshold": min_similarity,
+        "passed": sum(scores) / len(scores) >= min_similarity,
+        "worst": [{"similarity": round(s, 4), "source": src, "fp32": r, backend: c} for s, src, r, c in worst],
+        "validated_at": datetime.utcnow().isoformat(),
+    }
+    _write_json(os.path.join(artifact_path(model_name, backend), VALIDATION_FILE), report)
+    return report
+
+
+def sample_sentences(src: str, tgt: str, limit=50):
+    """Source sentences for a pair: curated/remembered segments first, else DEFAULT_SAMPLES for English."""
+    from db.database import SessionLocal
+    from db.models import TranslationMemory
+
+    db = SessionLocal()
+    try:
+        rows = db.query(TranslationMemory.source_text).filter(
+            TranslationMemory.input_lang == src, TranslationMemory.output_lang == tgt,
+        ).order_by(TranslationMemory.origin, TranslationMemory.id).limit(limit).all()
+    except Exception:
+        rows = []
+    finally:
+        db.close()
+    samples = [text for (text,) in rows if text.strip()]
+    if not samples and src == "en":
+        samples = list(DEFAULT_SAMPLES)
+    return samples
+
+
+def read_samples(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main(argv=None):
+    from service.langauge.model_registry import TRANSLATION_MODEL_TEMPLATE
+
+    parser = argparse.ArgumentParser(description="Convert and validate translation models for the faster backends.")
+    parser.add_argument("command", choices=("convert", "validate"))
+    parser.add_argument("pairs", nargs="+", help="Language pairs, e.g. en-fr de-en")
+    parser.add_argument("--backend", choices=BACKENDS[1:], default="onnx-int8")
+    parser.add_argument("--force", action="store_true", help="Rebuild artifacts that already exist")
+    parser.add_argument("--samples", help="Text file with one source sentence per line (validate)")
+    parser.add_argument("--min-similarity", type=float, default=TRANSLATION_VALIDATION_MIN_SIMILARITY)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for pair in args.pairs:
+        src, _, tgt = pair.strip().lower().partition("-")
+        model_name = TRANSLATION_MODEL_TEMPLATE.format(src=src, tgt=tgt)
+        if args.command == "convert":
+            print(f"{pair}: {convert_model(model_name, args.backend, force=args.force)}")
+            continue
+        samples = read_samples(args.samples) if args.samples else sample_sentences(src, tgt)
+        if not samples:
+            print(f"{pair}: no sample sentences; pass --samples")
+            failed = True
+            continue
+        convert_model(model_name, args.backend, force=args.force)
+        report = validate_backend(model_name, args.backend, samples, args.min_similarity)
+        failed = failed or not report["passed"]
+        print(f"{pair} ({args.backend}): {'PASS' if report['passed'] else 'FAIL'} mean similarity "
+              f"{report['mean_similarity']:.3f}, exact {report['exact_match']:.0%} over {report['samples']} samples")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from db.models import LanguageTranslation, TranslationMemory
+import hashlib
+import unicodedata
+
+# Lookups are chunked to stay under SQLite's bound-parameter limit
+LOOKUP_CHUNK = 500
+
+
+def normalize_segment(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def segment_hash(text: str) -> str:
+    return hashlib.sha256(normalize_segment(text).encode("utf-8")).hexdigest()
+
+
+def lookup_segments(db: Session, input_lang: str, output_lang: str, segments):
+    """Bulk lookup; returns {segment_hash: target_text} for the segments already in memory."""
+    hashes = list({segment_hash(s) for s in segments})
+    found = {}
+    for i in range(0, len(hashes), LOOKUP_CHUNK):
+        rows = db.query(TranslationMemory.segment_hash, TranslationMemory.target_text).filter(
+            TranslationMemory.input_lang == input_lang,
+            TranslationMemory.output_lang == output_lang,
+            TranslationMemory.segment_hash.in_(hashes[i:i + LOOKUP_CHUNK]),
+        ).all()
+        found.update(dict(rows))
+    return found
+
+
+def store_segments(db: Session, input_lang: str, output_lang: str, pairs, origin="model"):
+    """Write [(source, target), ...] back to the memory; segments already present are left alone."""
+    rows = {}
+    for source, target in pairs:
+        if source.strip() and target.strip():
+            rows.setdefault(segment_hash(source), (normalize_segment(source), target))
+    if not rows:
+        return 0
+    existing = lookup_segments(db, input_lang, output_lang, [source for source, _ in rows.values()])
+    now = datetime.utcnow()
+    mappings = [
+        {"input_lang": input_lang, "output_lang": output_lang, "segment_hash": h,
+         "source_text": source, "target_text": target, "origin": origin, "created_at": now}
+        for h, (source, target) in rows.items() if h not in existing
+    ]
+    if not mappings:
+        return 0
+    # Segments another request stored in the meantime are skipped row by row, not the whole batch
+    result = db.connection().execute(sqlite_insert(TranslationMemory.__table__).on_conflict_do_nothing(), mappings)
+    db.commit()
+    return max(result.rowcount, 0)
+
+
+def import_curated_translations(db: Session):
+    """Copy language_translations rows into the memory as whole-text segments (run at startup)."""
+    imported = 0
+    for (input_lang, output_lang), pairs in _group_curated(db.query(LanguageTranslation).all()).items():
+        imported += store_segments(db, input_lang, output_lang, pairs, origin="curated")
+    if imported:
+        print(f"[translation] Imported {imported} curated translations into the translation memory")
+    return imported
+
+
+def _group_curated(rows):
+    grouped = {}
+    for row in rows:
+        key = (row.input_lang.lower(), row.output_lang.lower())
+        grouped.setdefault(key, []).append((row.input_text, row.output_text))
+    return grouped
+
+
+# Curated rows added or edited while running take precedence over earlier model output
+@event.listens_for(LanguageTranslation, "after_insert")
+@event.listens_for(LanguageTranslation, "after_update")
+def _on_curated_translation_change(mapper, connection, target):
+    if not (target.input_text or "").strip() or not (target.output_text or "").strip():
+        return
+    table = TranslationMemory.__table__
+    input_lang, output_lang = target.input_lang.lower(), target.output_lang.lower()
+    h = segment_hash(target.input_text)
+    connection.execute(table.delete().where(
+        (table.c.input_lang == input_lang) & (table.c.output_lang == output_lang) & (table.c.segment_hash == h)
+    ))
+    connection.execute(table.insert().values(
+        input_lang=input_lang, output_lang=output_lang, segment_hash=h,
+        source_text=normalize_segment(target.input_text), target_text=target.output_text,
+        origin="curated", created_at=datetime.utcnow(),
+    ))
+
+
+# Deleting a curated row removes its memory entry, so the pair is translated by the model again
+@event.listens_for(LanguageTranslation, "after_delete")
+def _on_curated_translation_delete(mapper, connection, target):
+    if not (target.input_text or "").strip():
+        return
+    table = TranslationMemory.__table__
+    connection.execute(table.delete().where(
+        (table.c.input_lang == target.input_lang.lower()) & (table.c.output_lang == target.output_lang.lower())
+        & (table.c.segment_hash == segment_hash(target.input_text)) & (table.c.origin == "curated")
+    ))
@@ -0,0 +1,52 @@
+from fastapi.responses import StreamingResponse
+from docx import Document
+import os
+import tempfile
+
+# Downloads are built in memory and only spill to an (already unlinked) temporary file above this size
+TRANSLATION_SPOOL_BYTES = int(os.getenv("TRANSLATION_SPOOL_BYTES", str(8 * 1024 * 1024)))
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+# download_filetype -> (filename, media type)
+DOWNLOAD_FORMATS = {
+    "docx": ("translated.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "txt": ("translated.txt", "text/plain; charset=utf-8"),
+    "txt-download": ("translated.txt", "text/plain; charset=utf-8"),
+}
+
+
+def write_translation_output(translated_text: str, filetype: str, spool_bytes=TRANSLATION_SPOOL_BYTES):
+    """Write the translation as DOCX or TXT into a spooled buffer; returns (buffer, size) rewound to the start."""
+    buffer = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+    safe_text = translated_text if translated_text else ""
+    if filetype == "docx":
+        doc = Document()
+        doc.add_paragraph(safe_text)
+        doc.save(buffer)
+    else:
+        buffer.write(safe_text.encode("utf-8"))
+    size = buffer.tell()
+    buffer.seek(0)
+    return buffer, size
+
+
+def _iter_buffer(buffer):
+    try:
+        while True:
+            chunk = buffer.read(DOWNLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        buffer.close()
+
+
+def translation_download_response(translated_text: str, filetype: str):
+    """Streaming attachment response for a download_filetype listed in DOWNLOAD_FORMATS."""
+    filename, media_type = DOWNLOAD_FORMATS[filetype]
+    buffer, size = write_translation_output(translated_text, filetype)
+    return StreamingResponse(
+        _iter_buffer(buffer),
+        media_type=media_type,
+        headers={"Content-Length": str(size), "Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,90 @@
+from db.database import SessionLocal
+from service.langauge.translation_service import iter_document_parts, ocr_embedded_images, translate_text, new_extraction_stats
+import os
+import queue
+import threading
+
+# Pipelined translation: extraction -> OCR -> translation run as concurrent stages connected by
+# bounded queues, so the first page is translated while later pages are still being read.
+# The queue size bounds how far extraction/OCR may run ahead of translation.
+TRANSLATION_PIPELINE_QUEUE = int(os.getenv("TRANSLATION_PIPELINE_QUEUE", "2"))
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+class _StageError:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def _put(q, item, stop):
+    """Blocking put that gives up once the pipeline is stopped (e.g. the client disconnected)."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _extract_stage(filename, contents, stats, pdf_strategy, out_q, stop):
+    try:
+        for part in iter_document_parts(filename, contents, stats, pdf_strategy):
+            if not _put(out_q, part, stop):
+                return
+    except Exception as e:
+        _put(out_q, _StageError(e), stop)
+        return
+    _put(out_q, _DONE, stop)
+
+
+def _ocr_stage(stats, in_q, out_q, stop):
+    while not stop.is_set():
+        try:
+            item = in_q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if item is _DONE or isinstance(item, _StageError):
+            _put(out_q, item, stop)
+            return
+        page_number, text, images = item
+        try:
+            text += ocr_embedded_images(images, stats)
+        except Exception as e:
+            _put(out_q, _StageError(e), stop)
+            return
+        if not _put(out_q, (page_number, text), stop):
+            return
+
+
+def iter_pipelined_translation(filename: str, contents: bytes, input_lang: str, output_lang: str, stats=None,
+                               pdf_strategy=None):
+    """Yield (page_number, translated_text) for each non-empty page as soon as it is translated.
+
+    stats (see new_extraction_stats) receives the document's extraction and OCR counters and timings.
+    """
+    stats = stats if stats is not None else new_extraction_stats()
+    stop = threading.Event()
+    extracted = queue.Queue(maxsize=TRANSLATION_PIPELINE_QUEUE)
+    recognized = queue.Queue(maxsize=TRANSLATION_PIPELINE_QUEUE)
+    threading.Thread(target=_extract_stage, args=(filename, contents, stats, pdf_strategy, extracted, stop), daemon=True).start()
+    threading.Thread(target=_ocr_stage, args=(stats, extracted, recognized, stop), daemon=True).start()
+    # Own session: the response outlives the request-scoped one
+    db = SessionLocal()
+    try:
+        while True:
+            item = recognized.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            page_number, text = item
+            text = text.strip()
+            if text:
+                yield page_number, translate_text(db, input_lang, output_lang, text)
+    finally:
+        # Also runs when the consumer stops early, which unblocks and ends the stage threads
+        stop.set()
+        db.close()
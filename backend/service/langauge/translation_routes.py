@@ -1,19 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File
 from sqlalchemy.orm import Session
-from db.models import RoleEnum, LicenseEnum, LanguageTranslation, User
+from db.models import RoleEnum, LicenseEnum, User
 from db.database import get_db
 from auth.auth_manager import AuthManager
-from fastapi.responses import FileResponse, PlainTextResponse
-from transformers import pipeline
-from docx import Document
-import tempfile
-import fitz
-import docx
-import easyocr
-import numpy as np
-import cv2
-import io
-from PIL import Image
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from service.langauge.translation_service import (
+    extract_text_from_file, translate_text, new_extraction_stats, format_extraction_stats, resolve_pdf_strategy
+)
+from service.langauge.model_registry import translation_registry
+from service.langauge.translation_output import DOWNLOAD_FORMATS, translation_download_response
+from service.langauge.translation_pipeline import iter_pipelined_translation
+from core.streaming import STREAM_MEDIA_TYPES, format_stream_event
+import time
 
 router = APIRouter()
 
@@ -26,7 +25,9 @@ async def language_translation(
     file: UploadFile = File(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(AuthManager.get_current_user),
-    download_filetype: str = Form(None)
+    download_filetype: str = Form(None),
+    stream: str = Form(None),
+    pdf_strategy: str = Form(None)
 ):
     has_text = text_input is not None and text_input.strip() != ""
     has_file = file is not None
@@ -38,47 +39,37 @@ async def language_translation(
             detail="Please provide either text input or a file, but not both."
         )
 
-    text = text_input if has_text else ""
+    # Validated up front so a bad value is a 400 rather than an error event mid-stream
+    pdf_strategy = resolve_pdf_strategy(pdf_strategy)
+
+    contents = None
     if has_file:
-        filename = file.filename.lower()
         contents = await file.read()
         if not contents:
             raise HTTPException(status_code=400, detail="Uploaded file is empty.")
-        if filename.endswith(".txt"):
-            text = contents.decode("utf-8")
-        elif filename.endswith(".pdf"):
-            doc = fitz.open(stream=contents, filetype="pdf")
-            reader = easyocr.Reader(['en'], gpu=False)
-            for page in doc:
-                text += page.get_text()
-                images = page.get_images(full=True)
-                for img_index, img in enumerate(images):
-                    xref = img[0]
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
-                    img_np = np.array(image)
-                    img_cv = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
-                    ocr_result = reader.readtext(img_cv, detail=0)
-                    if ocr_result:
-                        text += " " + " ".join(ocr_result)
-        elif filename.endswith(".docx"):
-            docx_doc = docx.Document(io.BytesIO(contents))
-            reader = easyocr.Reader(['en'], gpu=False)
-            for para in docx_doc.paragraphs:
-                text += para.text + " "
-            for rel in docx_doc.part._rels:
-                rel_obj = docx_doc.part._rels[rel]
-                if "image" in rel_obj.target_ref:
-                    image_data = rel_obj.target_part.blob
-                    image = Image.open(io.BytesIO(image_data)).convert('RGB')
-                    img_np = np.array(image)
-                    img_cv = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
-                    ocr_result = reader.readtext(img_cv, detail=0)
-                    if ocr_result:
-                        text += " " + " ".join(ocr_result)
-        else:
+
+    if stream:
+        # Pipelined mode: pages are extracted, OCR'd and translated concurrently and streamed as they finish
+        stream_format = stream.strip().lower()
+        if stream_format not in STREAM_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail="Invalid stream format. Use 'ndjson' or 'sse'.")
+        if download_filetype:
+            raise HTTPException(status_code=400, detail="download_filetype cannot be combined with stream.")
+        filename = file.filename if has_file else "input.txt"
+        if not filename.lower().endswith((".txt", ".pdf", ".docx")):
             raise HTTPException(status_code=400, detail="Unsupported file format. Use TXT, PDF, or DOCX.")
+        source = contents if has_file else text_input.encode("utf-8")
+        return StreamingResponse(
+            stream_translation(filename, source, input_lang, output_lang, stream_format, pdf_strategy),
+            media_type=STREAM_MEDIA_TYPES[stream_format]
+        )
+
+    text = text_input if has_text else ""
+    extraction = None
+    if has_file:
+        extraction = new_extraction_stats()
+        # OCR and model calls block; keep them off the event loop
+        text = await run_in_threadpool(extract_text_from_file, file.filename, contents, extraction, pdf_strategy)
 
     # LOGGING: Print the extracted text for debugging
     print("Extracted text from file:", repr(text))
@@ -86,92 +77,49 @@ async def language_translation(
     if not text:
         print("No text found after extraction.")
         raise HTTPException(status_code=400, detail="No text found in the document or input.")
-    match = db.query(LanguageTranslation).filter(
-        LanguageTranslation.input_lang == input_lang.lower(),
-        LanguageTranslation.output_lang == output_lang.lower(),
-        LanguageTranslation.input_text.ilike(f"%{text.strip()}%")
-    ).first()
-    if match:
-        translated_text = match.output_text
-        if download_filetype == "docx":
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as tmp:
-                doc = Document()
-                safe_text = translated_text if translated_text else ""
-                doc.add_paragraph(safe_text)
-                doc.save(tmp.name)
-                tmp.flush()
-                return FileResponse(
-                    path=tmp.name,
-                    filename="translated.docx",
-                    media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                )
-        elif download_filetype in ("txt", "txt-download"):
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.txt', mode='w', encoding='utf-8') as tmp:
-                safe_text = translated_text if translated_text else ""
-                tmp.write(safe_text)
-                tmp.flush()
-                return FileResponse(
-                    path=tmp.name,
-                    filename="translated.txt",
-                    media_type="text/plain; charset=utf-8"
-                )
-        return {"translated_text": translated_text}
+
+    translated_text = await run_in_threadpool(translate_text, db, input_lang, output_lang, text)
+
+    if download_filetype in DOWNLOAD_FORMATS:
+        return translation_download_response(translated_text, download_filetype)
+    if extraction is not None:
+        return {"translated_text": translated_text, "extraction": format_extraction_stats(extraction)}
+    return {"translated_text": translated_text}
+
+
+def stream_translation(filename: str, contents: bytes, input_lang: str, output_lang: str, stream_format: str,
+                       pdf_strategy=None):
+    """Yield one record per translated page as NDJSON or SSE, ending with a summary."""
+    start = time.time()
+    pages = 0
+    extraction = new_extraction_stats()
+    try:
+        for page_number, translated_text in iter_pipelined_translation(
+            filename, contents, input_lang, output_lang, extraction, pdf_strategy
+        ):
+            record = {
+                "index": pages,
+                "page": page_number,
+                "translated_text": translated_text,
+                "elapsed_ms": round((time.time() - start) * 1000, 1),
+            }
+            pages += 1
+            yield format_stream_event(record, stream_format)
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield format_stream_event({"error": f"Translation failed: {detail}", "pages": pages}, stream_format, event="error")
+        return
+    summary = {"pages": pages, "elapsed_ms": round((time.time() - start) * 1000, 1),
+               "extraction": format_extraction_stats(extraction)}
+    if stream_format == "sse":
+        yield format_stream_event(summary, stream_format, event="done")
     else:
-        # Fallback: Use HuggingFace transformers pipeline for translation
-        input_lang_code = input_lang.lower()
-        output_lang_code = output_lang.lower()
-        try:
-            model_name = f"Helsinki-NLP/opus-mt-{input_lang_code}-{output_lang_code}"
-            translator = pipeline(
-                "translation",
-                model=model_name
-            )
-            # Split text into chunks of max 800 characters (to stay under token limit)
-            def split_text(text, max_chars=800):
-                chunks = []
-                for i in range(0, len(text), max_chars):
-                    chunks.append(text[i:i+max_chars])
-                return chunks
-            text_chunks = split_text(text)
-            translated_chunks = []
-            for chunk in text_chunks:
-                translated = translator(chunk, max_length=512)
-                translated_text = translated[0]['translation_text'] if translated and 'translation_text' in translated[0] else ""
-                translated_chunks.append(translated_text)
-            translated_text = '\n'.join(translated_chunks)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Translation failed: {str(e)}")
+        yield format_stream_event({"done": True, **summary}, stream_format)
+
 
-        if download_filetype == "docx":
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as tmp:
-                doc = Document()
-                safe_text = translated_text if translated_text else ""
-                doc.add_paragraph(safe_text)
-                doc.save(tmp.name)
-                tmp.flush()
-                return FileResponse(
-                    path=tmp.name,
-                    filename="translated.docx",
-                    media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                )
-        elif download_filetype == "txt":
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.txt', mode='w', encoding='utf-8') as tmp:
-                safe_text = translated_text if translated_text else ""
-                tmp.write(safe_text)
-                tmp.flush()
-                return FileResponse(
-                    path=tmp.name,
-                    filename="translated.txt",
-                    media_type="text/plain; charset=utf-8"
-                )
-        elif download_filetype == "txt-download":
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.txt', mode='w', encoding='utf-8') as tmp:
-                safe_text = translated_text if translated_text else ""
-                tmp.write(safe_text)
-                tmp.flush()
-                return FileResponse(
-                    path=tmp.name,
-                    filename="translated.txt",
-                    media_type="text/plain; charset=utf-8"
-                )
-        return {"translated_text": translated_text}
+@router.get("/usecase/language-translation/model-stats")
+@AuthManager.check_access([RoleEnum.Editor], [LicenseEnum.Enterprise])
+async def language_translation_model_stats(
+    current_user: User = Depends(AuthManager.get_current_user),
+):
+    return translation_registry.get_stats()
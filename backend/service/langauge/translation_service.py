@@ -0,0 +1,310 @@
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from service.langauge.model_registry import translation_registry
+from service.langauge.segmentation import split_paragraphs, split_sentences, fit_segments, tokenizer_counter
+from service.langauge.translation_memory import lookup_segments, store_segments, segment_hash
+import fitz
+import docx
+from core.ocr import get_reader_pool, OCR_READERS_PER_LANG
+import numpy as np
+import cv2
+import io
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import threading
+import time
+
+# Source tokens per model input (Marian models accept 512; leave room for special tokens);
+# longer sentences are split at word boundaries
+TRANSLATION_CHUNK_TOKENS = int(os.getenv("TRANSLATION_CHUNK_TOKENS", "400"))
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "8"))
+TRANSLATION_MAX_LENGTH = 512
+# Size of the parts TXT/DOCX documents are split into for pipelined translation
+TRANSLATION_PART_CHARS = int(os.getenv("TRANSLATION_PART_CHARS", "4000"))
+# Embedded images whose shorter side is below this many pixels (bullets, rules, icons) are not OCR'd
+TRANSLATION_OCR_MIN_IMAGE_SIDE = int(os.getenv("TRANSLATION_OCR_MIN_IMAGE_SIDE", "48"))
+# Threads OCR-ing a document's images side by side; the shared English reader pool is grown to
+# this many readers (each holds its own model weights) so every thread gets one
+TRANSLATION_OCR_WORKERS = int(os.getenv("TRANSLATION_OCR_WORKERS", str(max(2, OCR_READERS_PER_LANG))))
+# How PDF pages are read: "text" uses the text layer only, "ocr" rasterizes every page for one OCR
+# pass, "auto" uses the text layer when it has real content and rasterizes the page otherwise
+PDF_STRATEGIES = ("text", "ocr", "auto")
+TRANSLATION_PDF_STRATEGY = os.getenv("TRANSLATION_PDF_STRATEGY", "auto").strip().lower()
+TRANSLATION_OCR_DPI = int(os.getenv("TRANSLATION_OCR_DPI", "200"))
+# A text layer with fewer letters/digits than this (or mostly symbols) counts as a scanned page
+TRANSLATION_PDF_MIN_TEXT_CHARS = int(os.getenv("TRANSLATION_PDF_MIN_TEXT_CHARS", "20"))
+# Also OCR images embedded in PDF pages read from the text layer (figures with text in them)
+TRANSLATION_PDF_IMAGE_OCR = os.getenv("TRANSLATION_PDF_IMAGE_OCR", "0") == "1"
+
+
+def new_extraction_stats():
+    """Per-document counters filled in by iter_document_parts and ocr_embedded_images."""
+    return {"pages": 0, "pages_text": 0, "pages_ocr": 0, "images_found": 0, "images_duplicate": 0, "images_small": 0, "images_unreadable": 0,
+            "ocr_passes": 0, "extraction_seconds": 0.0, "ocr_seconds": 0.0}
+
+
+def format_extraction_stats(stats):
+    result = dict(stats)
+    result["extraction_seconds"] = round(stats["extraction_seconds"], 3)
+    result["ocr_seconds"] = round(stats["ocr_seconds"], 3)
+    return result
+
+
+class _EmbeddedImageFilter:
+    """Drops repeated (same xref/part or same bytes) and tiny embedded images within one document."""
+
+    def __init__(self, stats):
+        self.stats = stats
+        self._keys = set()
+        self._digests = set()
+
+    def accept(self, key, load_blob, size=None):
+        """Return the image bytes to OCR, or None when the image is skipped."""
+        self.stats["images_found"] += 1
+        if key in self._keys:
+            self.stats["images_duplicate"] += 1
+            return None
+        self._keys.add(key)
+        # PDFs report the size up front, so tiny images are skipped without extracting them
+        if size is not None and min(size) < TRANSLATION_OCR_MIN_IMAGE_SIDE:
+            self.stats["images_small"] += 1
+            return None
+        blob = load_blob()
+        if size is None:
+            try:
+                size = Image.open(io.BytesIO(blob)).size
+            except Exception:
+                self.stats["images_unreadable"] += 1
+                return None
+            if min(size) < TRANSLATION_OCR_MIN_IMAGE_SIDE:
+                self.stats["images_small"] += 1
+                return None
+        digest = hashlib.sha1(blob).digest()
+        if digest in self._digests:
+            self.stats["images_duplicate"] += 1
+            return None
+        self._digests.add(digest)
+        return blob
+
+
+def resolve_pdf_strategy(strategy=None) -> str:
+    strategy = (strategy or TRANSLATION_PDF_STRATEGY).strip().lower()
+    if strategy not in PDF_STRATEGIES:
+        raise HTTPException(status_code=400, detail="Invalid pdf_strategy. Use 'text', 'ocr' or 'auto'.")
+    return strategy
+
+
+def has_meaningful_text(text: str, min_chars=TRANSLATION_PDF_MIN_TEXT_CHARS) -> bool:
+    """True when a page's text layer looks like real text rather than nothing, stray marks or garbled glyphs."""
+    visible = [c for c in text if not c.isspace()]
+    alnum = sum(1 for c in visible if c.isalnum())
+    return alnum >= min_chars and alnum >= 0.5 * len(visible)
+
+
+def _rasterize_page(page, dpi=TRANSLATION_OCR_DPI):
+    """Render a PDF page once to a BGR array for OCR."""
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+    rgb = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+def iter_document_parts(filename: str, contents: bytes, stats=None, pdf_strategy=None):
+    """Yield (page_number, text, images) one page at a time without running OCR.
+
+    PDFs yield real pages read according to pdf_strategy (default TRANSLATION_PDF_STRATEGY); a page
+    that needs OCR yields empty text and its rendered raster as the only image. TXT and DOCX are
+    split into parts of about TRANSLATION_PART_CHARS characters at paragraph boundaries (DOCX images
+    are attached to the last part). Each distinct embedded image is yielded once per document, and
+    images below TRANSLATION_OCR_MIN_IMAGE_SIDE are dropped. Time spent here is added to
+    stats["extraction_seconds"].
+    """
+    stats = stats if stats is not None else new_extraction_stats()
+    strategy = resolve_pdf_strategy(pdf_strategy)
+    parts = _iter_document_parts(filename.lower(), contents, _EmbeddedImageFilter(stats), strategy, stats)
+    while True:
+        started = time.perf_counter()
+        try:
+            part = next(parts)
+        except StopIteration:
+            return
+        finally:
+            stats["extraction_seconds"] += time.perf_counter() - started
+        stats["pages"] += 1
+        yield part
+
+
+def _iter_document_parts(filename: str, contents: bytes, image_filter, pdf_strategy, stats):
+    if filename.endswith(".txt"):
+        yield from _paragraph_parts(contents.decode("utf-8").split("\n\n"), "\n\n", [])
+    elif filename.endswith(".pdf"):
+        doc = fitz.open(stream=contents, filetype="pdf")
+        for page_number, page in enumerate(doc, start=1):
+            text = page.get_text() if pdf_strategy != "ocr" else ""
+            if pdf_strategy == "ocr" or (pdf_strategy == "auto" and not has_meaningful_text(text)):
+                # Scanned page: one OCR pass over the whole page instead of its individual images
+                stats["pages_ocr"] += 1
+                yield page_number, "", [_rasterize_page(page)]
+                continue
+            stats["pages_text"] += 1
+            images = []
+            if TRANSLATION_PDF_IMAGE_OCR:
+                for img in page.get_images(full=True):
+                    xref, width, height = img[0], img[2], img[3]
+                    blob = image_filter.accept(xref, lambda: doc.extract_image(xref)["image"], size=(width, height))
+                    if blob is not None:
+                        images.append(blob)
+            yield page_number, text, images
+    elif filename.endswith(".docx"):
+        docx_doc = docx.Document(io.BytesIO(contents))
+        images = []
+        for rel in docx_doc.part._rels:
+            rel_obj = docx_doc.part._rels[rel]
+            if "image" in rel_obj.target_ref:
+                part = rel_obj.target_part
+                blob = image_filter.accept(str(part.partname), lambda: part.blob)
+                if blob is not None:
+                    images.append(blob)
+        # Blank-line separated so each DOCX paragraph stays its own translation segment
+        yield from _paragraph_parts([para.text for para in docx_doc.paragraphs], "\n\n", images)
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use TXT, PDF, or DOCX.")
+
+
+def _paragraph_parts(paragraphs, separator: str, last_images):
+    part = []
+    size = 0
+    page_number = 1
+    for paragraph in paragraphs:
+        if part and size + len(paragraph) > TRANSLATION_PART_CHARS:
+            yield page_number, separator.join(part), []
+            page_number += 1
+            part, size = [], 0
+        part.append(paragraph)
+        size += len(paragraph)
+    yield page_number, separator.join(part), last_images
+
+
+_ocr_executor = None
+_ocr_executor_lock = threading.Lock()
+
+
+def _get_ocr_executor():
+    global _ocr_executor
+    if _ocr_executor is None:
+        with _ocr_executor_lock:
+            if _ocr_executor is None:
+                _ocr_executor = ThreadPoolExecutor(max_workers=TRANSLATION_OCR_WORKERS, thread_name_prefix="translation-ocr")
+    return _ocr_executor
+
+
+def _ocr_image(image):
+    """OCR an embedded image blob, or a rendered page (BGR array) with its lines grouped into paragraphs."""
+    reader = get_reader_pool(['en'], min_size=TRANSLATION_OCR_WORKERS)
+    if isinstance(image, np.ndarray):
+        # Ends with a newline like page.get_text(), so consecutive pages do not run together
+        paragraphs = reader.readtext(image, detail=0, paragraph=True)
+        return "\n\n".join(paragraphs) + "\n" if paragraphs else ""
+    rgb = Image.open(io.BytesIO(image)).convert('RGB')
+    img_cv = cv2.cvtColor(np.array(rgb), cv2.COLOR_RGB2BGR)
+    return " ".join(reader.readtext(img_cv, detail=0))
+
+
+def _ocr_batch(images, stats):
+    """OCR images in parallel; returns the recognised text of each, in image order."""
+    if not images:
+        return []
+    started = time.perf_counter()
+    results = list(_get_ocr_executor().map(_ocr_image, images))
+    if stats is not None:
+        stats["ocr_passes"] += len(images)
+        stats["ocr_seconds"] += time.perf_counter() - started
+    return results
+
+
+def _join_ocr_text(results) -> str:
+    text = ""
+    for ocr_text in results:
+        if ocr_text:
+            text += " " + ocr_text
+    return text
+
+
+def ocr_embedded_images(images, stats=None) -> str:
+    """OCR a part's images in parallel; returns the recognised text (in image order) joined with spaces."""
+    return _join_ocr_text(_ocr_batch(images, stats))
+
+
+def extract_text_from_file(filename: str, contents: bytes, stats=None, pdf_strategy=None) -> str:
+    """Extract text (plus OCR of embedded images or scanned pages) from a TXT, PDF or DOCX upload."""
+    stats = stats if stats is not None else new_extraction_stats()
+    parts = list(iter_document_parts(filename, contents, stats, pdf_strategy))
+    # One batch for the whole document so images from different pages are OCR'd side by side
+    results = iter(_ocr_batch([image for _, _, images in parts for image in images], stats))
+    texts = [text + _join_ocr_text([next(results) for _ in images]) for _, text, images in parts]
+    separator = "" if filename.lower().endswith(".pdf") else "\n\n"
+    return separator.join(texts)
+
+
+def translate_segments(translator, segments, max_tokens=TRANSLATION_CHUNK_TOKENS, batch_size=TRANSLATION_BATCH_SIZE):
+    """Translate segments with a MarianMT pipeline in batches; returns translations in segment order."""
+    if not segments:
+        return []
+    pieces, owners = fit_segments(segments, tokenizer_counter(translator.tokenizer), max_tokens)
+    # Similar-length inputs share a batch, which keeps padding (and wasted compute) low
+    order = sorted(range(len(pieces)), key=lambda i: len(pieces[i]))
+    translated = translator([pieces[i] for i in order], batch_size=batch_size, max_length=TRANSLATION_MAX_LENGTH)
+    by_position = [""] * len(pieces)
+    for i, item in zip(order, translated):
+        by_position[i] = item.get("translation_text", "") if item else ""
+    results = [[] for _ in segments]
+    for owner, text in zip(owners, by_position):
+        results[owner].append(text)
+    return [" ".join(parts) for parts in results]
+
+
+def translate_text(db: Session, input_lang: str, output_lang: str, text: str) -> str:
+    """Translate text from the translation memory where possible, sending only unseen sentences to MarianMT.
+
+    The whole text, each paragraph and each sentence are looked up in one bulk query; paragraphs
+    (blank-line separated) are kept in the output.
+    """
+    input_lang_code = input_lang.lower()
+    output_lang_code = output_lang.lower()
+    paragraphs = [(p, split_sentences(p)) for p in split_paragraphs(text)]
+    if not paragraphs:
+        return ""
+    candidates = [text] + [p for p, _ in paragraphs] + [s for _, sentences in paragraphs for s in sentences]
+    memory = lookup_segments(db, input_lang_code, output_lang_code, candidates)
+    whole = memory.get(segment_hash(text))
+    if whole is not None:
+        return whole
+
+    missing = []
+    for paragraph, sentences in paragraphs:
+        if segment_hash(paragraph) in memory:
+            continue
+        for sentence in sentences:
+            h = segment_hash(sentence)
+            if h not in memory:
+                memory[h] = None
+                missing.append(sentence)
+
+    if missing:
+        # Fallback: Use HuggingFace transformers pipeline for translation
+        try:
+            # Shared, memory-bounded model registry instead of loading the model per request
+            translator = translation_registry.get(input_lang_code, output_lang_code)
+            translations = translate_segments(translator, missing)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Translation failed: {str(e)}")
+        for sentence, translated in zip(missing, translations):
+            memory[segment_hash(sentence)] = translated
+        store_segments(db, input_lang_code, output_lang_code, list(zip(missing, translations)))
+
+    output = []
+    for paragraph, sentences in paragraphs:
+        cached = memory.get(segment_hash(paragraph))
+        output.append(cached if cached is not None else " ".join(memory[segment_hash(s)] for s in sentences))
+    return "\n\n".join(output)
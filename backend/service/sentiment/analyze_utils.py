@@ -16,17 +16,17 @@ def calculate_percentages(label_match_counts):
 def analyze_sentiment_with_percentage(text: str, db: Session):
     label_data = db.query(SentimentLabel).all()
     print(f"[DEBUG] Sentiment labels from DB: {label_data}")
-    label_match_counts = {label.sentiment.lower(): 0 for label in label_data}
+    label_match_counts = {label.label.lower(): 0 for label in label_data}
     print(f"[DEBUG] Initial label match counts: {label_match_counts}")
     total_keywords = 0
     print(f"[DEBUG] Input text: {repr(text)}")
     for label_entry in label_data:
-        keywords = [kw.strip().lower() for kw in label_entry.keyword.split(',')]
-        print(f"[DEBUG] Checking label '{label_entry.sentiment}' with keywords: {keywords}")
+        keywords = [kw.strip().lower() for kw in label_entry.keywords.split(',')]
+        print(f"[DEBUG] Checking label '{label_entry.label}' with keywords: {keywords}")
         for keyword in keywords:
             if keyword in text.lower():
                 print(f"[DEBUG] Found keyword match: '{keyword}' in text")
-                label_match_counts[label_entry.sentiment.lower()] += 1
+                label_match_counts[label_entry.label.lower()] += 1
                 total_keywords += 1
     print(f"[DEBUG] Final label match counts: {label_match_counts}")
     print(f"[DEBUG] Total keywords matched: {total_keywords}")
@@ -0,0 +1,144 @@
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from db.database import engine
+from db.models import SentimentLabel, CacheVersion
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Any insert/update/delete on sentiment_labels bumps this cache_versions row (by trigger, so edits
+# from other processes or plain SQL count too); a request only reads the counter to know the index is current.
+KEYWORD_VERSION_NAME = "sentiment_labels"
+_VERSION_DDL = [
+    f"INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('{KEYWORD_VERSION_NAME}', 0)",
+] + [
+    f"CREATE TRIGGER IF NOT EXISTS sentiment_labels_version_{suffix} AFTER {op} ON sentiment_labels BEGIN "
+    f"UPDATE cache_versions SET version = version + 1 WHERE name = '{KEYWORD_VERSION_NAME}'; END"
+    for suffix, op in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+]
+
+_version_triggers = None
+_version_lock = threading.Lock()
+
+# Bumped by the ORM listeners below whenever a SentimentLabel row changes in this process
+_local_version = 0
+_cached_index = None
+_cache_lock = threading.Lock()
+
+
+def ensure_keyword_version(bind=engine) -> bool:
+    """Create the keyword version row and its triggers (SQLite); returns False when edits are tracked by the ORM only."""
+    global _version_triggers
+    with _version_lock:
+        if _version_triggers is not None:
+            return _version_triggers
+        _version_triggers = False
+        if bind.dialect.name != "sqlite":
+            return False
+        with bind.begin() as conn:
+            for ddl in _VERSION_DDL:
+                conn.execute(text(ddl))
+        _version_triggers = True
+        return True
+
+
+class KeywordIndex:
+    """Compiled token/phrase -> label lookup built from the SentimentLabel table.
+
+    Single-word keywords are matched per whitespace token, exactly like the
+    original per-line loop. Multi-word keywords are matched as token n-grams.
+    """
+
+    def __init__(self, labels, version=None):
+        self.version = version
+        self.label_names = []
+        self.phrases = {}  # tuple(tokens) -> tuple(label names)
+        self.max_phrase_len = 1
+        phrase_labels = {}
+        for label_entry in labels:
+            name = label_entry.label.lower()
+            if name not in self.label_names:
+                self.label_names.append(name)
+            for kw in label_entry.keywords.split(","):
+                tokens = tuple(kw.strip().lower().split())
+                if not tokens:
+                    continue
+                phrase_labels.setdefault(tokens, [])
+                if name not in phrase_labels[tokens]:
+                    phrase_labels[tokens].append(name)
+                self.max_phrase_len = max(self.max_phrase_len, len(tokens))
+        self.phrases = {k: tuple(v) for k, v in phrase_labels.items()}
+        # Content hash of the compiled labels; identical across processes for identical rows
+        canonical = "|".join(f"{' '.join(k)}={','.join(v)}" for k, v in sorted(self.phrases.items()))
+        self.signature = hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+    def match_counts(self, entry: str):
+        """Return ({label: count}, total_matches, [(keyword, labels), ...]) for one entry."""
+        words = entry.lower().split()
+        counts = {}
+        matched = []
+        total = 0
+        phrases = self.phrases
+        for i in range(len(words)):
+            for n in range(1, min(self.max_phrase_len, len(words) - i) + 1):
+                hit = phrases.get(tuple(words[i:i + n]))
+                if not hit:
+                    continue
+                for name in hit:
+                    counts[name] = counts.get(name, 0) + 1
+                    total += 1
+                matched.append((" ".join(words[i:i + n]), hit))
+        return counts, total, matched
+
+    def score(self, entry: str):
+        """Score one feedback entry; returns a SentimentOut-shaped dict or None when nothing matched."""
+        counts, total, _ = self.match_counts(entry)
+        if total == 0:
+            return None
+        percentages = {label: int((count / total) * 100) for label, count in counts.items() if count > 0}
+        summary = max(percentages, key=percentages.get)
+        return {"summary": summary.capitalize(), "percentage": percentages}
+
+
+def _db_version(db: Session) -> int:
+    ensure_keyword_version(db.get_bind())
+    row = db.query(CacheVersion.version).filter(CacheVersion.name == KEYWORD_VERSION_NAME).first()
+    return row[0] if row else 0
+
+
+def get_keyword_index(db: Session) -> KeywordIndex:
+    """Return the process-wide compiled index, rebuilding it only when the labels changed."""
+    global _cached_index
+    version = (_local_version, _db_version(db))
+    index = _cached_index
+    if index is not None and index.version == version:
+        return index
+    with _cache_lock:
+        if _cached_index is None or _cached_index.version != version:
+            rows = db.query(SentimentLabel.label, SentimentLabel.keywords).order_by(SentimentLabel.id).all()
+            _cached_index = KeywordIndex(rows, version=version)
+            logger.info("Keyword index rebuilt: %d keywords, version=%s", len(_cached_index.phrases), version)
+        return _cached_index
+
+
+def invalidate_keyword_index():
+    global _local_version, _cached_index
+    _local_version += 1
+    _cached_index = None
+
+
+@event.listens_for(SentimentLabel, "after_insert")
+@event.listens_for(SentimentLabel, "after_update")
+@event.listens_for(SentimentLabel, "after_delete")
+def _on_label_change(mapper, connection, target):
+    invalidate_keyword_index()
+    # Engines without the version triggers bump the shared counter from the ORM, in the same transaction
+    if _version_triggers is False:
+        table = CacheVersion.__table__
+        updated = connection.execute(
+            table.update().where(table.c.name == KEYWORD_VERSION_NAME).values(version=table.c.version + 1)
+        )
+        if not updated.rowcount:
+            connection.execute(table.insert().values(name=KEYWORD_VERSION_NAME, version=1))
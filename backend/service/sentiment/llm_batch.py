@@ -0,0 +1,142 @@
+from concurrent.futures import ThreadPoolExecutor
+from core.llm_gateway import get_llm_gateway, LLMUnavailable
+import os
+import re
+import json as pyjson
+
+LLM_MODEL = "llama-3.3-70b-versatile"
+# Upper bounds for one batched request; whichever limit is hit first closes the batch
+LLM_BATCH_SIZE = int(os.getenv("SENTIMENT_LLM_BATCH_SIZE", "25"))
+LLM_BATCH_MAX_CHARS = int(os.getenv("SENTIMENT_LLM_BATCH_MAX_CHARS", "6000"))
+# Re-asks for entries missing from an otherwise valid answer; transport errors are retried by the gateway
+MAX_RETRIES = 3
+
+ALLOWED_KEYS = ['Positive', 'Negative', 'Neutral']
+
+BATCH_SYSTEM_PROMPT = (
+    "You are a sentiment analysis assistant. "
+    "You will receive a JSON array of objects {\"index\": <int>, \"text\": <string>}. "
+    "Analyze the sentiment of every text and respond ONLY with a JSON array in this format: "
+    "[{\"index\": <same int>, \"summary\": <one of: Positive, Negative, Neutral>, "
+    "\"percentage\": {\"Positive\": <int>, \"Negative\": <int>, \"Neutral\": <int>}}]. "
+    "Return exactly one object per input index. Percentages must sum to 100. Do not add any explanation."
+)
+
+
+def clean_percentages(perc: dict):
+    """Threshold, renormalize and round model percentages into a SentimentOut dict."""
+    perc_floats = {k: float(perc.get(k, 0)) for k in ALLOWED_KEYS}
+    threshold = 20.0
+    perc_thresholded = {k: (v if v >= threshold else 0.0) for k, v in perc_floats.items()}
+    if sum(perc_thresholded.values()) == 0:
+        main_key = max(perc_floats, key=perc_floats.get)
+        perc_thresholded = {k: (100.0 if k == main_key else 0.0) for k in ALLOWED_KEYS}
+    total = sum(perc_thresholded.values())
+    if total > 0:
+        perc_norm = {k: (v * 100.0 / total) for k, v in perc_thresholded.items()}
+    else:
+        perc_norm = {k: 0.0 for k in ALLOWED_KEYS}
+    perc_rounded = {k: int(round(v)) for k, v in perc_norm.items()}
+    diff = 100 - sum(perc_rounded.values())
+    if diff != 0:
+        main_key = max(perc_norm, key=perc_norm.get)
+        perc_rounded[main_key] += diff
+    return {
+        'summary': max(perc_rounded, key=perc_rounded.get),
+        'percentage': perc_rounded
+    }
+
+
+def make_batches(items, batch_size=LLM_BATCH_SIZE, max_chars=LLM_BATCH_MAX_CHARS):
+    """Split [(index, text), ...] into batches bounded by entry count and total characters."""
+    batches = []
+    current = []
+    current_chars = 0
+    for item in items:
+        size = len(item[1])
+        if current and (len(current) >= batch_size or current_chars + size > max_chars):
+            batches.append(current)
+            current = []
+            current_chars = 0
+        current.append(item)
+        current_chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_batch_response(response: str, expected_indices):
+    """Map a model JSON array back to {index: cleaned result}; unknown or malformed items are dropped."""
+    match = re.search(r'\[.*\]', response, re.DOTALL)
+    if not match:
+        raise ValueError(f"Groq did not return a valid JSON array: {response}")
+    parsed = pyjson.loads(match.group(0))
+    if not isinstance(parsed, list):
+        raise ValueError("Groq response is not a JSON array.")
+    expected = set(expected_indices)
+    results = {}
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("index"))
+        except (TypeError, ValueError):
+            continue
+        perc = item.get("percentage")
+        if index not in expected or not isinstance(perc, dict):
+            continue
+        results[index] = clean_percentages(perc)
+    return results
+
+
+def _call_batch(gateway, batch):
+    payload = [{"index": index, "text": text} for index, text in batch]
+    response = gateway.complete(
+        [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": pyjson.dumps(payload, ensure_ascii=False)}
+        ],
+        model=LLM_MODEL,
+    )
+    return parse_batch_response(response.strip(), [index for index, _ in batch])
+
+
+def classify_batch(gateway, batch, max_retries=MAX_RETRIES):
+    """Classify one batch, retrying only the entries that are still missing after each attempt."""
+    results = {}
+    pending = list(batch)
+    last_error = None
+    for attempt in range(max_retries):
+        try:
+            results.update(_call_batch(gateway, pending))
+            last_error = None
+        except LLMUnavailable:
+            raise
+        except Exception as e:
+            last_error = e
+            print(f"[sentiment] LLM batch attempt {attempt + 1} failed: {str(e)}")
+        pending = [item for item in pending if item[0] not in results]
+        if not pending:
+            return results
+    if last_error is not None:
+        raise last_error
+    raise ValueError(f"Groq returned no result for entries {[index for index, _ in pending]}")
+
+
+def classify_unmatched(items, client=None, batch_size=LLM_BATCH_SIZE, max_chars=LLM_BATCH_MAX_CHARS):
+    """Classify [(index, text), ...] with the LLM in size-bounded batches; returns {index: result}.
+
+    ``client`` is an LLMGateway; the process-wide gateway is used when omitted.
+    """
+    if not items:
+        return {}
+    gateway = client or get_llm_gateway()
+    # Batches are submitted together; the gateway's concurrency limits decide how many run at once
+    batches = make_batches(items, batch_size, max_chars)
+    if len(batches) == 1:
+        return classify_batch(gateway, batches[0])
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(len(batches), gateway.model_concurrency)) as executor:
+        for batch_results in executor.map(lambda batch: classify_batch(gateway, batch), batches):
+            results.update(batch_results)
+    return results
@@ -0,0 +1,96 @@
+from transformers import pipeline
+from service.sentiment.llm_batch import clean_percentages
+import os
+import threading
+import time
+
+# Local CPU tier between the keyword index and Groq.
+# SENTIMENT_LOCAL_BACKEND: "torch" (fp32), "int8" (dynamic quantization), "onnx" (ONNX Runtime) or "off"
+LOCAL_MODEL_NAME = os.getenv("SENTIMENT_LOCAL_MODEL", "lxyuan/distilbert-base-multilingual-cased-sentiments-student")
+LOCAL_BACKEND = os.getenv("SENTIMENT_LOCAL_BACKEND", "torch").lower()
+LOCAL_BATCH_SIZE = int(os.getenv("SENTIMENT_LOCAL_BATCH_SIZE", "32"))
+# Entries whose top label score is below this go on to Groq
+LOCAL_MIN_CONFIDENCE = float(os.getenv("SENTIMENT_LOCAL_MIN_CONFIDENCE", "0.8"))
+
+LABEL_MAP = {
+    "positive": "Positive", "pos": "Positive", "label_2": "Positive",
+    "negative": "Negative", "neg": "Negative", "label_0": "Negative",
+    "neutral": "Neutral", "neu": "Neutral", "label_1": "Neutral",
+}
+
+_classifier = None
+_classifier_failed = False
+_load_lock = threading.Lock()
+
+
+def _build_classifier(model_name: str, backend: str):
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            from transformers import AutoTokenizer
+        except ImportError:
+            print("[sentiment] optimum[onnxruntime] is not installed, falling back to torch backend.")
+        else:
+            model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            return pipeline("text-classification", model=model, tokenizer=tokenizer, top_k=None)
+    if backend == "int8":
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return pipeline("text-classification", model=model, tokenizer=tokenizer, top_k=None, device=-1)
+    return pipeline("text-classification", model=model_name, top_k=None, device=-1)
+
+
+def get_local_classifier():
+    """Load the local sentiment pipeline once per process; returns None when disabled or unavailable."""
+    global _classifier, _classifier_failed
+    if LOCAL_BACKEND == "off" or _classifier_failed:
+        return None
+    if _classifier is None:
+        with _load_lock:
+            if _classifier is None and not _classifier_failed:
+                start = time.time()
+                try:
+                    _classifier = _build_classifier(LOCAL_MODEL_NAME, LOCAL_BACKEND)
+                    print(f"[sentiment] Local model '{LOCAL_MODEL_NAME}' ({LOCAL_BACKEND}) loaded in {time.time() - start:.2f}s")
+                except Exception as e:
+                    _classifier_failed = True
+                    print(f"[sentiment] Local model unavailable, using Groq only: {str(e)}")
+    return _classifier
+
+
+def scores_to_result(scores):
+    """Convert pipeline label scores into (SentimentOut dict, top confidence)."""
+    perc = {"Positive": 0.0, "Negative": 0.0, "Neutral": 0.0}
+    for item in scores:
+        key = LABEL_MAP.get(str(item["label"]).lower())
+        if key:
+            perc[key] += float(item["score"]) * 100.0
+    confidence = max(perc.values()) / 100.0
+    return clean_percentages(perc), confidence
+
+
+def classify_local(items, min_confidence=LOCAL_MIN_CONFIDENCE, batch_size=LOCAL_BATCH_SIZE):
+    """Run [(index, text), ...] through the local model in batches.
+
+    Returns ({index: result} for confident predictions, [(index, text), ...] still needing the LLM).
+    """
+    classifier = get_local_classifier()
+    if classifier is None or not items:
+        return {}, list(items)
+    texts = [text for _, text in items]
+    outputs = classifier(texts, batch_size=batch_size, truncation=True)
+    results = {}
+    remaining = []
+    for (index, text), scores in zip(items, outputs):
+        if isinstance(scores, dict):
+            scores = [scores]
+        result, confidence = scores_to_result(scores)
+        if confidence >= min_confidence:
+            results[index] = result
+        else:
+            remaining.append((index, text))
+    return results, remaining
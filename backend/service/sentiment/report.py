@@ -0,0 +1,75 @@
+from service.sentiment.analyze_utils import calculate_percentages
+
+UNCATEGORIZED = "Uncategorized"
+TOP_KEYWORDS = 10
+
+
+def split_category(line: str, delimiter: str = None):
+    """Split 'Category<delimiter>feedback' into (category, feedback); lines without it are Uncategorized."""
+    if delimiter and delimiter in line:
+        category, text = line.split(delimiter, 1)
+        category, text = category.strip(), text.strip()
+        if category and text:
+            return category, text
+    return UNCATEGORIZED, line
+
+
+def _distribution(counts: dict):
+    return {
+        "total": sum(counts.values()),
+        "counts": dict(counts),
+        "percentage": calculate_percentages(counts) if counts else {},
+    }
+
+
+class SentimentReport:
+    """Single-pass aggregation of scored entries into overall/per-category distributions.
+
+    Only the entries of the requested detail page are retained, so memory does not grow
+    with the input size.
+    """
+
+    def __init__(self, keyword_index, detail_page: int = None, detail_page_size: int = 100, top_keywords: int = TOP_KEYWORDS):
+        self.keyword_index = keyword_index
+        self.top_keywords = top_keywords
+        self.overall = {}
+        self.categories = {}
+        self.keyword_counts = {}  # label -> {keyword: count}
+        self.detail_page = detail_page
+        self.detail_page_size = detail_page_size
+        if detail_page is not None:
+            self._detail_start = (detail_page - 1) * detail_page_size
+            self._detail_end = self._detail_start + detail_page_size
+        self.entries = []
+
+    def add(self, index: int, category: str, entry: str, result: dict):
+        summary = result["summary"].capitalize()
+        self.overall[summary] = self.overall.get(summary, 0) + 1
+        category_counts = self.categories.setdefault(category, {})
+        category_counts[summary] = category_counts.get(summary, 0) + 1
+
+        _, total, matched = self.keyword_index.match_counts(entry)
+        if total:
+            for keyword, labels in matched:
+                for label in labels:
+                    label_counts = self.keyword_counts.setdefault(label.capitalize(), {})
+                    label_counts[keyword] = label_counts.get(keyword, 0) + 1
+
+        if self.detail_page is not None and self._detail_start <= index < self._detail_end:
+            self.entries.append({"index": index, "category": category, **result})
+
+    def to_dict(self):
+        top_keywords = {}
+        for label, counts in self.keyword_counts.items():
+            ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:self.top_keywords]
+            top_keywords[label] = [{"keyword": k, "count": c} for k, c in ranked]
+        report = {
+            "overall": _distribution(self.overall),
+            "categories": {name: _distribution(counts) for name, counts in self.categories.items()},
+            "top_keywords": top_keywords,
+        }
+        if self.detail_page is not None:
+            report["entries"] = self.entries
+            report["page"] = self.detail_page
+            report["page_size"] = self.detail_page_size
+        return report
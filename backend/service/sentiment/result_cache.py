@@ -0,0 +1,173 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from db.database import SessionLocal
+from db.models import SentimentResultCache
+import hashlib
+import json as pyjson
+import os
+import threading
+
+# Per-entry sentiment result cache: in-process LRU in front of a persistent table
+CACHE_ENABLED = os.getenv("SENTIMENT_CACHE_ENABLED", "1") != "0"
+CACHE_MEMORY_SIZE = int(os.getenv("SENTIMENT_CACHE_MEMORY_SIZE", "10000"))
+CACHE_MAX_ROWS = int(os.getenv("SENTIMENT_CACHE_MAX_ROWS", "200000"))
+CACHE_TTL_SECONDS = int(os.getenv("SENTIMENT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Row-count eviction runs after this many persisted writes rather than on every window
+EVICTION_CHECK_INTERVAL = 1000
+
+
+def normalize_entry(entry: str) -> str:
+    return " ".join(entry.lower().split())
+
+
+def entry_hash(entry: str) -> str:
+    return hashlib.sha256(normalize_entry(entry).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Two-level cache of SentimentOut dicts keyed by normalized-text hash.
+
+    Entries are tied to the keyword index signature they were computed against, so any
+    SentimentLabel change turns every older entry into a miss.
+    """
+
+    def __init__(self, memory_size=CACHE_MEMORY_SIZE, max_rows=CACHE_MAX_ROWS, ttl_seconds=CACHE_TTL_SECONDS,
+                 session_factory=SessionLocal):
+        self.memory_size = memory_size
+        self._session_factory = session_factory
+        self.max_rows = max_rows
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._memory = OrderedDict()  # text_hash -> (signature, created_at, result)
+        self._lock = threading.Lock()
+        self._signature = None
+        self._writes_since_eviction = 0
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _check_signature(self, signature: str):
+        # Caller holds the lock
+        if signature != self._signature:
+            self._memory.clear()
+            self._signature = signature
+
+    def _remember(self, text_hash, signature, created_at, result):
+        # Caller holds the lock
+        self._memory[text_hash] = (signature, created_at, result)
+        self._memory.move_to_end(text_hash)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, hashes, signature: str):
+        """Look up several hashes at once; returns {text_hash: result} for fresh hits."""
+        now = datetime.utcnow()
+        found = {}
+        missing = []
+        with self._lock:
+            self._check_signature(signature)
+            for text_hash in hashes:
+                cached = self._memory.get(text_hash)
+                if cached and now - cached[1] <= self.ttl:
+                    self._memory.move_to_end(text_hash)
+                    found[text_hash] = cached[2]
+                    self.stats["memory_hits"] += 1
+                else:
+                    if cached:
+                        del self._memory[text_hash]
+                    missing.append(text_hash)
+        if not missing:
+            return found
+
+        db = self._session_factory()
+        try:
+            rows = db.query(SentimentResultCache).filter(SentimentResultCache.text_hash.in_(missing)).all()
+            stale = []
+            with self._lock:
+                for row in rows:
+                    if row.label_signature != signature or now - row.created_at > self.ttl:
+                        stale.append(row.text_hash)
+                        continue
+                    result = pyjson.loads(row.result)
+                    found[row.text_hash] = result
+                    self._remember(row.text_hash, signature, row.created_at, result)
+                    self.stats["db_hits"] += 1
+                self.stats["misses"] += len(missing) - (len(rows) - len(stale))
+            if stale:
+                db.query(SentimentResultCache).filter(
+                    SentimentResultCache.text_hash.in_(stale)
+                ).delete(synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+        return found
+
+    def put_many(self, items, signature: str):
+        """Store {text_hash: result} computed against the given label signature."""
+        if not items:
+            return
+        now = datetime.utcnow()
+        with self._lock:
+            self._check_signature(signature)
+            for text_hash, result in items.items():
+                self._remember(text_hash, signature, now, result)
+            self.stats["writes"] += len(items)
+            self._writes_since_eviction += len(items)
+            run_eviction = self._writes_since_eviction >= EVICTION_CHECK_INTERVAL
+            if run_eviction:
+                self._writes_since_eviction = 0
+        db = self._session_factory()
+        try:
+            for text_hash, result in items.items():
+                db.merge(SentimentResultCache(
+                    text_hash=text_hash,
+                    label_signature=signature,
+                    result=pyjson.dumps(result),
+                    created_at=now,
+                ))
+            db.commit()
+            if run_eviction:
+                self._evict(db, now)
+        finally:
+            db.close()
+
+    def _evict(self, db, now):
+        """Drop expired rows, then the oldest rows beyond the size limit."""
+        removed = db.query(SentimentResultCache).filter(
+            SentimentResultCache.created_at < now - self.ttl
+        ).delete(synchronize_session=False)
+        overflow = db.query(SentimentResultCache).count() - self.max_rows
+        if overflow > 0:
+            oldest = select(SentimentResultCache.text_hash).order_by(
+                SentimentResultCache.created_at
+            ).limit(overflow)
+            removed += db.query(SentimentResultCache).filter(
+                SentimentResultCache.text_hash.in_(oldest)
+            ).delete(synchronize_session=False)
+        db.commit()
+        with self._lock:
+            self.stats["evictions"] += removed
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        db = self._session_factory()
+        try:
+            db.query(SentimentResultCache).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["db_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_result_cache = ResultCache() if CACHE_ENABLED else None
+
+
+def get_result_cache():
+    """Return the process-wide result cache, or None when SENTIMENT_CACHE_ENABLED=0."""
+    return _result_cache
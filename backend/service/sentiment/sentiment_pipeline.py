@@ -0,0 +1,118 @@
+from fastapi import HTTPException
+from docx import Document
+from service.sentiment.llm_batch import classify_unmatched
+from service.sentiment.local_model import classify_local
+from service.sentiment.result_cache import entry_hash, get_result_cache
+import PyPDF2
+import io
+import os
+
+# Entries scored together before results are released; bounds memory for streaming responses
+SCORING_WINDOW = int(os.getenv("SENTIMENT_SCORING_WINDOW", "200"))
+
+_DEFAULT_CACHE = object()
+
+
+def extract_feedback_content(filename: str, file_content: bytes) -> str:
+    """Extract the raw feedback text from a PDF, DOCX or TXT upload."""
+    ext = filename.split(".")[-1].lower()
+    if ext == "pdf":
+        reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+        return " ".join(page.extract_text() for page in reader.pages if page.extract_text())
+    elif ext == "docx":
+        doc = Document(io.BytesIO(file_content))
+        return "\n".join(p.text for p in doc.paragraphs)
+    elif ext == "txt":
+        return file_content.decode("utf-8")
+    raise HTTPException(status_code=400, detail="Unsupported file type")
+
+
+def iter_feedback_entries(content: str):
+    """Yield the non-empty feedback lines of a document without building an intermediate list."""
+    for line in content.splitlines():
+        entry = line.strip()
+        if entry:
+            yield entry
+
+
+def _score_window(window, keyword_index, llm_client=None, cache=None):
+    results = {}
+    unmatched = []
+    for index, entry in window:
+        # Try DB-based sentiment analysis first
+        result_obj = keyword_index.score(entry)
+        if result_obj is not None:
+            results[index] = result_obj
+        else:
+            unmatched.append((index, entry))
+    if not unmatched:
+        return results
+
+    # Repeated lines ("thanks", signatures, ...) are scored once per window and served from the cache
+    groups = {}
+    for index, entry in unmatched:
+        groups.setdefault(entry_hash(entry), []).append((index, entry))
+    cached = cache.get_many(list(groups), keyword_index.signature) if cache is not None else {}
+    pending = [members[0] for text_hash, members in groups.items() if text_hash not in cached]
+
+    # Local CPU model next; only low-confidence entries continue to Groq
+    scored = {}
+    if pending:
+        local_results, pending = classify_local(pending)
+        scored.update(local_results)
+
+    # Fallback: Use Groq generative AI for nuanced sentiment analysis ONLY, in size-bounded batches
+    if pending:
+        scored.update(classify_unmatched(pending, client=llm_client))
+
+    fresh = {}
+    for text_hash, members in groups.items():
+        result_obj = cached.get(text_hash)
+        if result_obj is None:
+            result_obj = scored[members[0][0]]
+            fresh[text_hash] = result_obj
+        for index, _ in members:
+            results[index] = result_obj
+    if cache is not None:
+        cache.put_many(fresh, keyword_index.signature)
+    return results
+
+
+def score_entries(entries, keyword_index, window_size=SCORING_WINDOW, llm_client=None, cache=_DEFAULT_CACHE):
+    """Score feedback entries through the keyword -> local model -> LLM tiers.
+
+    Entries are processed in windows of ``window_size`` so batching still applies while
+    memory stays bounded. Results not found by the keyword index go through ``cache``
+    (the process-wide result cache unless given; ``None`` disables it).
+    Yields ``(index, entry, result)`` in input order.
+    """
+    if cache is _DEFAULT_CACHE:
+        cache = get_result_cache()
+    window = []
+    for index, entry in enumerate(entries):
+        window.append((index, entry))
+        if len(window) >= window_size:
+            results = _score_window(window, keyword_index, llm_client, cache)
+            for i, e in window:
+                yield i, e, results[i]
+            window = []
+    if window:
+        results = _score_window(window, keyword_index, llm_client, cache)
+        for i, e in window:
+            yield i, e, results[i]
+
+
+class RunningAggregate:
+    """Single-pass running totals over scored entries."""
+
+    def __init__(self):
+        self.processed = 0
+        self.summary_counts = {}
+
+    def add(self, result):
+        self.processed += 1
+        summary = result["summary"]
+        self.summary_counts[summary] = self.summary_counts.get(summary, 0) + 1
+
+    def snapshot(self):
+        return {"processed": self.processed, "summary_counts": dict(self.summary_counts)}
@@ -1,27 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File
 from sqlalchemy.orm import Session
-from db.models import RoleEnum, LicenseEnum, SentimentLabel, User
+from db.models import RoleEnum, LicenseEnum, User
 from db.database import get_db
-from api.schemas import SentimentOut
+from api.schemas import SentimentOut, SentimentReportOut
+from service.sentiment.keyword_index import get_keyword_index
+from service.sentiment.result_cache import get_result_cache
+from service.sentiment.report import SentimentReport, split_category
+from service.sentiment.sentiment_pipeline import extract_feedback_content, iter_feedback_entries, score_entries, RunningAggregate
 from auth.auth_manager import AuthManager
-from fastapi.responses import PlainTextResponse
-import io
-from docx import Document
-import PyPDF2
-from transformers import pipeline
-from groq import Groq
-import os
-from typing import List
-import json as pyjson
-import re
+from core.llm_gateway import LLMUnavailable
+from core.streaming import STREAM_MEDIA_TYPES, format_stream_event
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import List, Union
 
 router = APIRouter()
 
-@router.post("/usecase/sentiment-analysis", response_model=List[SentimentOut])
+
+@router.post("/usecase/sentiment-analysis", response_model=Union[List[SentimentOut], SentimentReportOut])
 @AuthManager.check_access([RoleEnum.Viewer], [LicenseEnum.Teams])
 async def sentiment_analysis(
     text_input: str = Form(None),
     file: UploadFile = File(None),
+    stream: str = Form(None),
+    report: bool = Form(False),
+    category_delimiter: str = Form(None),
+    detail_page: int = Form(None),
+    detail_page_size: int = Form(100),
     db: Session = Depends(get_db),
     current_user: User = Depends(AuthManager.get_current_user)
 ):
@@ -42,101 +47,98 @@ async def sentiment_analysis(
             detail="Please provide either text input or a file."
         )
 
+    if stream and report:
+        raise HTTPException(status_code=400, detail="Streaming is not available for reports; use either stream or report.")
+
     content = text_input if text_input_clean else ""
     if file_valid:
-        ext = file.filename.split(".")[-1].lower()
         file_content = await file.read()
         if not file_content:
             raise HTTPException(status_code=400, detail="Uploaded file is empty.")
-        if ext == "pdf":
-            reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-            content = " ".join(page.extract_text() for page in reader.pages if page.extract_text())
-        elif ext == "docx":
-            doc = Document(io.BytesIO(file_content))
-            content = "\n".join(p.text for p in doc.paragraphs)
-        elif ext == "txt":
-            content = file_content.decode("utf-8")
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file type")
+        content = extract_feedback_content(file.filename, file_content)
 
     content = content.strip()
     if not content:
         raise HTTPException(status_code=400, detail="No text found in the document or input.")
 
-    # Split content into individual feedback entries
-    feedback_entries = [entry.strip() for entry in content.split("\n") if entry.strip()]
-
-    results = []
-    for entry in feedback_entries:
-        # Try DB-based sentiment analysis first
-        labels = db.query(SentimentLabel).all()
-        words = entry.lower().split()
-        label_match_counts = {label.label.lower(): 0 for label in labels}
-        total_keywords = 0
-        for label_entry in labels:
-            keywords = [kw.strip().lower() for kw in label_entry.keywords.split(",")]
-            for word in words:
-                if word in keywords:
-                    label_match_counts[label_entry.label.lower()] += 1
-                    total_keywords += 1
-        if total_keywords > 0:
-            percentages = {}
-            for label, count in label_match_counts.items():
-                if count > 0:
-                    percentages[label] = int((count / total_keywords) * 100)
-            summary = max(percentages, key=percentages.get)
-            result_obj = {"summary": summary.capitalize(), "percentage": percentages}
-            results.append(result_obj)
-            continue
-
-        # Fallback: Use Groq generative AI for nuanced sentiment analysis ONLY
+    # Compiled keyword index is loaded once per request (rebuilt only when labels change)
+    keyword_index = get_keyword_index(db)
+    feedback_entries = iter_feedback_entries(content)
+
+    if stream:
+        stream_format = stream.strip().lower()
+        if stream_format not in STREAM_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail="Invalid stream format. Use 'ndjson' or 'sse'.")
+        return StreamingResponse(
+            stream_sentiment(feedback_entries, keyword_index, stream_format),
+            media_type=STREAM_MEDIA_TYPES[stream_format]
+        )
+
+    if report:
+        if (detail_page is not None and detail_page < 1) or detail_page_size < 1:
+            raise HTTPException(status_code=400, detail="detail_page and detail_page_size must be positive.")
         try:
-            groq_api_key = os.getenv("GROQ_API_KEY")
-            client = Groq(api_key=groq_api_key)
-            system_prompt = (
-                "You are a sentiment analysis assistant. "
-                "Given a text, analyze its sentiment and respond ONLY in this JSON format: "
-                "{\"summary\": <one of: Positive, Negative, Neutral>, \"percentage\": {\"Positive\": <int>, \"Negative\": <int>, \"Neutral\": <int>}}. "
-                "Percentages must sum to 100. Do not add any explanation."
+            return await run_in_threadpool(
+                build_sentiment_report, content, keyword_index, category_delimiter, detail_page, detail_page_size
             )
-            user_prompt = f"Analyze the sentiment of the following text: {entry}"
-            chat_completion = client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                model="llama-3.3-70b-versatile",
-            )
-            response = chat_completion.choices[0].message.content.strip()
-            match = re.search(r'\{.*\}', response, re.DOTALL)
-            if match:
-                response_json = pyjson.loads(match.group(0))
-                allowed_keys = ['Positive', 'Negative', 'Neutral']
-                perc = response_json.get('percentage', {})
-                perc_floats = {k: float(perc.get(k, 0)) for k in allowed_keys}
-                threshold = 20.0
-                perc_thresholded = {k: (v if v >= threshold else 0.0) for k, v in perc_floats.items()}
-                if sum(perc_thresholded.values()) == 0:
-                    main_key = max(perc_floats, key=perc_floats.get)
-                    perc_thresholded = {k: (100.0 if k == main_key else 0.0) for k in allowed_keys}
-                total = sum(perc_thresholded.values())
-                if total > 0:
-                    perc_norm = {k: (v * 100.0 / total) for k, v in perc_thresholded.items()}
-                else:
-                    perc_norm = {k: 0.0 for k in allowed_keys}
-                perc_rounded = {k: int(round(v)) for k, v in perc_norm.items()}
-                diff = 100 - sum(perc_rounded.values())
-                if diff != 0:
-                    main_key = max(perc_norm, key=perc_norm.get)
-                    perc_rounded[main_key] += diff
-                cleaned_response = {
-                    'summary': max(perc_rounded, key=perc_rounded.get),
-                    'percentage': perc_rounded
-                }
-                results.append(cleaned_response)
-            else:
-                raise Exception(f"Groq did not return valid JSON: {response}")
+        except LLMUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Sentiment analysis failed: {str(e)}")
 
+    try:
+        # Scoring blocks on the local model and LLM gateway, keep it off the event loop
+        results = await run_in_threadpool(
+            lambda: [result_obj for _, _, result_obj in score_entries(feedback_entries, keyword_index)]
+        )
+    except LLMUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sentiment analysis failed: {str(e)}")
+
     return results
+
+
+def build_sentiment_report(content: str, keyword_index, category_delimiter: str = None,
+                           detail_page: int = None, detail_page_size: int = 100):
+    """Score every entry once and fold it straight into the aggregate report."""
+    sentiment_report = SentimentReport(keyword_index, detail_page, detail_page_size)
+    # Categories of entries still inside the scoring window, keyed by entry index
+    pending_categories = {}
+
+    def texts():
+        for index, line in enumerate(iter_feedback_entries(content)):
+            category, text = split_category(line, category_delimiter)
+            pending_categories[index] = category
+            yield text
+
+    for index, entry, result_obj in score_entries(texts(), keyword_index):
+        sentiment_report.add(index, pending_categories.pop(index), entry, result_obj)
+    return sentiment_report.to_dict()
+
+
+def stream_sentiment(feedback_entries, keyword_index, stream_format: str):
+    """Yield one scored record per entry (with its index and the running aggregate) as NDJSON or SSE."""
+    aggregate = RunningAggregate()
+    try:
+        for index, _, result_obj in score_entries(feedback_entries, keyword_index):
+            aggregate.add(result_obj)
+            record = {"index": index, **result_obj, "aggregate": aggregate.snapshot()}
+            yield format_stream_event(record, stream_format)
+    except Exception as e:
+        error = {"error": f"Sentiment analysis failed: {str(e)}", "aggregate": aggregate.snapshot()}
+        yield format_stream_event(error, stream_format, event="error")
+        return
+    if stream_format == "sse":
+        yield format_stream_event(aggregate.snapshot(), stream_format, event="done")
+
+
+@router.get("/usecase/sentiment-analysis/cache-stats")
+@AuthManager.check_access([RoleEnum.Viewer], [LicenseEnum.Teams])
+async def sentiment_cache_stats(
+    current_user: User = Depends(AuthManager.get_current_user)
+):
+    cache = get_result_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.get_stats()}
@@ -0,0 +1,31 @@
+from batch_cli import load_checkpoint
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def test_missing_checkpoint_means_nothing_done(tmp_path):
+    assert load_checkpoint(str(tmp_path / "out.jsonl")) == set()
+
+
+def test_only_inputs_with_a_result_count_as_done(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(output, ['{"id": "a", "result": []}', '{"id": "b", "error": "boom"}'])
+    assert load_checkpoint(str(output)) == {"a"}
+
+
+def test_retry_supersedes_the_earlier_error(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(output, [
+        '{"id": "a", "error": "boom"}',
+        '{"id": "b", "error": "boom"}',
+        '{"id": "a", "result": {"translated_text": "x"}}',
+    ])
+    assert load_checkpoint(str(output)) == {"a"}
+
+
+def test_partially_written_last_line_is_ignored(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text('{"id": "a", "result": 1}\n{"id": "b", "res', encoding="utf-8")
+    assert load_checkpoint(str(output)) == {"a"}
@@ -0,0 +1,66 @@
+from sqlalchemy import text
+from db.models import SentimentLabel
+from service.sentiment import keyword_index
+from service.sentiment.keyword_index import KeywordIndex, get_keyword_index
+import pytest
+
+
+class Label:
+    def __init__(self, label, keywords):
+        self.label = label
+        self.keywords = keywords
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    # Each test has its own engine, so the triggers and the cached index must be set up again
+    monkeypatch.setattr(keyword_index, "_version_triggers", None)
+    monkeypatch.setattr(keyword_index, "_cached_index", None)
+
+
+def test_single_words_match_per_token():
+    index = KeywordIndex([Label("Positive", "good, great"), Label("Negative", "bad")])
+    counts, total, _ = index.match_counts("Good food, great service but bad parking")
+    assert counts == {"positive": 2, "negative": 1}
+    assert total == 3
+
+
+def test_multi_word_keywords_match_as_ngrams():
+    index = KeywordIndex([Label("Negative", "not good, bad"), Label("Positive", "good")])
+    counts, total, matched = index.match_counts("the food was not good")
+    # "not good" and the single word "good" are both matched, as separate keywords
+    assert counts == {"negative": 1, "positive": 1}
+    assert ("not good", ("negative",)) in matched
+    assert index.score("nothing to see here") is None
+
+
+def test_keyword_shared_by_labels_counts_for_each():
+    index = KeywordIndex([Label("Positive", "fine"), Label("Neutral", "fine")])
+    assert index.score("fine") == {"summary": "Positive", "percentage": {"positive": 50, "neutral": 50}}
+
+
+def test_index_is_reused_until_labels_change(db):
+    db.add(SentimentLabel(label="Positive", keywords="good"))
+    db.commit()
+    first = get_keyword_index(db)
+    assert get_keyword_index(db) is first
+
+    db.add(SentimentLabel(label="Negative", keywords="bad"))
+    db.commit()
+    second = get_keyword_index(db)
+    assert second is not first
+    assert second.score("bad")["summary"] == "Negative"
+
+
+def test_edit_outside_the_orm_invalidates_the_index(db, engine):
+    db.add(SentimentLabel(label="Positive", keywords="good"))
+    db.commit()
+    first = get_keyword_index(db)
+
+    # Another process or plain SQL: only the trigger-maintained version changes
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE sentiment_labels SET keywords = 'excellent'"))
+    second = get_keyword_index(db)
+    assert second is not first
+    assert second.score("good") is None
+    assert second.score("excellent")["summary"] == "Positive"
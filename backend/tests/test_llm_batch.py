@@ -0,0 +1,57 @@
+from service.sentiment.llm_batch import classify_batch, classify_unmatched, make_batches
+import json as pyjson
+
+
+class ScriptedGateway:
+    """Answers each call with the next scripted set of indices (or raises it) and records what was asked."""
+
+    model_concurrency = 2
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.requests = []
+
+    def complete(self, messages, model, **kwargs):
+        payload = pyjson.loads(messages[-1]["content"])
+        self.requests.append([item["index"] for item in payload])
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return pyjson.dumps([
+            {"index": index, "summary": "Positive", "percentage": {"Positive": 90, "Negative": 5, "Neutral": 5}}
+            for index in answer
+        ])
+
+
+def test_retries_only_the_missing_indices():
+    gateway = ScriptedGateway([[0, 2], [1]])
+    results = classify_batch(gateway, [(0, "a"), (1, "b"), (2, "c")])
+    assert sorted(results) == [0, 1, 2]
+    assert gateway.requests == [[0, 1, 2], [1]]
+
+
+def test_failed_attempt_is_retried_with_the_same_entries():
+    gateway = ScriptedGateway([ValueError("not json"), [0], [1]])
+    results = classify_batch(gateway, [(0, "a"), (1, "b")])
+    assert sorted(results) == [0, 1]
+    assert gateway.requests == [[0, 1], [0, 1], [1]]
+
+
+def test_unknown_indices_in_the_answer_are_ignored():
+    gateway = ScriptedGateway([[0, 7], [1]])
+    results = classify_batch(gateway, [(0, "a"), (1, "b")])
+    assert sorted(results) == [0, 1]
+    assert gateway.requests[1] == [1]
+
+
+def test_batches_are_bounded_by_count_and_characters():
+    items = [(i, "x" * 10) for i in range(5)]
+    assert [len(b) for b in make_batches(items, batch_size=2, max_chars=1000)] == [2, 2, 1]
+    assert [len(b) for b in make_batches(items, batch_size=10, max_chars=25)] == [2, 2, 1]
+
+
+def test_unmatched_entries_map_back_to_their_index():
+    gateway = ScriptedGateway([[3, 8]])
+    results = classify_unmatched([(3, "a"), (8, "b")], client=gateway)
+    assert set(results) == {3, 8}
+    assert results[3]["summary"] == "Positive"
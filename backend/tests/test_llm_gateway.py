@@ -0,0 +1,114 @@
+from core.llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailable
+import asyncio
+import pytest
+import time
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class ScriptedBackend:
+    def __init__(self, outcomes, delay=0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+
+    async def complete(self, messages, model, **kwargs):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_gateway(backend, breaker, max_retries=1):
+    return LLMGateway(backend=backend, model_limits={}, max_retries=max_retries, backoff_base=0, backoff_max=0,
+                      breaker=breaker)
+
+
+def run(gateway, timeout=5):
+    return asyncio.run(gateway._complete([{"role": "user", "content": "hi"}], "m", timeout))
+
+
+def open_breaker(breaker):
+    breaker.failures = breaker.threshold
+    breaker.opened_at = time.time() - breaker.reset_seconds - 1
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    breaker = CircuitBreaker(threshold=2, reset_seconds=60)
+    gateway = make_gateway(ScriptedBackend([StatusError(400)] * 5), breaker)
+    for _ in range(5):
+        with pytest.raises(StatusError):
+            run(gateway)
+    assert breaker.state == "closed"
+
+
+def test_service_errors_open_the_breaker_and_short_circuit():
+    breaker = CircuitBreaker(threshold=2, reset_seconds=60)
+    backend = ScriptedBackend([StatusError(503), StatusError(503)])
+    gateway = make_gateway(backend, breaker)
+    for _ in range(2):
+        with pytest.raises(StatusError):
+            run(gateway)
+    assert breaker.state == "open"
+    with pytest.raises(LLMUnavailable):
+        run(gateway)
+    assert backend.calls == 2
+
+
+def test_half_open_allows_one_trial_and_closes_on_success():
+    breaker = CircuitBreaker(threshold=1, reset_seconds=60)
+    open_breaker(breaker)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(threshold=5, reset_seconds=60)
+    open_breaker(breaker)
+    gateway = make_gateway(ScriptedBackend([StatusError(502)]), breaker)
+    with pytest.raises(StatusError):
+        run(gateway)
+    assert breaker.state == "open"
+
+
+def test_client_error_on_trial_releases_it():
+    breaker = CircuitBreaker(threshold=5, reset_seconds=60)
+    open_breaker(breaker)
+    gateway = make_gateway(ScriptedBackend([StatusError(422), "ok"]), breaker)
+    with pytest.raises(StatusError):
+        run(gateway)
+    assert breaker.state == "half_open"
+    assert run(gateway) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_cancelled_trial_is_released():
+    breaker = CircuitBreaker(threshold=1, reset_seconds=60)
+    open_breaker(breaker)
+    gateway = make_gateway(ScriptedBackend(["ok"], delay=5), breaker)
+
+    async def cancel_trial():
+        task = asyncio.ensure_future(gateway._complete([{"role": "user", "content": "hi"}], "m", 10))
+        await asyncio.sleep(0.05)
+        assert breaker.trial_in_flight
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert not breaker.trial_in_flight
+
+
+def test_zero_retries_still_makes_one_attempt():
+    gateway = make_gateway(ScriptedBackend(["ok"]), CircuitBreaker(), max_retries=0)
+    assert run(gateway) == "ok"
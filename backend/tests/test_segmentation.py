@@ -0,0 +1,61 @@
+from service.langauge import translation_service
+from service.langauge.segmentation import fit_segments, split_paragraphs, split_sentences
+from service.langauge.translation_service import translate_segments, translate_text
+
+
+def count_words(texts):
+    return [len(text.split()) for text in texts]
+
+
+class WordTokenizer:
+    def __call__(self, texts, add_special_tokens=False):
+        return {"input_ids": [text.split() for text in texts]}
+
+
+class UpperTranslator:
+    """Stands in for a MarianMT pipeline: upper-cases each input and records the inputs it saw."""
+
+    tokenizer = WordTokenizer()
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, inputs, batch_size=None, max_length=None):
+        self.calls.append(list(inputs))
+        return [{"translation_text": text.upper()} for text in inputs]
+
+
+def test_paragraphs_and_sentences_are_split_on_boundaries():
+    text = "First line\nwrapped here. Second sentence!\n\n\nNext paragraph?"
+    assert split_paragraphs(text) == ["First line wrapped here. Second sentence!", "Next paragraph?"]
+    assert split_sentences("One. Two! Three? Four") == ["One.", "Two!", "Three?", "Four"]
+
+
+def test_segments_over_the_budget_are_split_at_words():
+    pieces, owners = fit_segments(["a b c d e", "f g"], count_words, max_tokens=2)
+    assert pieces == ["a b", "c d", "e", "f g"]
+    assert owners == [0, 0, 0, 1]
+
+
+def test_split_segments_are_rejoined_in_order():
+    translator = UpperTranslator()
+    assert translate_segments(translator, ["a b c", "d"], max_tokens=2, batch_size=8) == ["A B C", "D"]
+    assert sorted(translator.calls[0]) == ["a b", "c", "d"]
+
+
+def test_translate_text_keeps_paragraphs(db, monkeypatch):
+    translator = UpperTranslator()
+    monkeypatch.setattr(translation_service.translation_registry, "get", lambda src, tgt: translator)
+    text = "Hello there. How are you?\n\nSecond paragraph."
+    assert translate_text(db, "en", "fr", text) == "HELLO THERE. HOW ARE YOU?\n\nSECOND PARAGRAPH."
+    # Every sentence went to the model once, in a single batched call
+    assert len(translator.calls) == 1
+    assert sorted(translator.calls[0]) == ["Hello there.", "How are you?", "Second paragraph."]
+
+
+def test_remembered_sentences_skip_the_model(db, monkeypatch):
+    translator = UpperTranslator()
+    monkeypatch.setattr(translation_service.translation_registry, "get", lambda src, tgt: translator)
+    translate_text(db, "en", "fr", "Hello there.")
+    assert translate_text(db, "en", "fr", "Hello there. New one.") == "HELLO THERE. NEW ONE."
+    assert translator.calls[-1] == ["New one."]
@@ -0,0 +1,42 @@
+from db.models import LanguageTranslation, TranslationMemory
+from service.langauge.translation_memory import lookup_segments, segment_hash, store_segments
+
+
+def test_segment_hash_normalises_whitespace_and_unicode():
+    assert segment_hash("Hello   world \n") == segment_hash("Hello world")
+    # "é" precomposed vs "e" + combining acute accent
+    assert segment_hash("café") == segment_hash("café")
+    assert segment_hash("Hello world") != segment_hash("hello world")
+
+
+def test_stored_segments_are_found_again(db):
+    assert store_segments(db, "en", "fr", [("Good  morning.", "Bonjour."), ("Thanks.", "Merci.")]) == 2
+    found = lookup_segments(db, "en", "fr", ["Good morning.", "Thanks.", "Unknown."])
+    assert found == {segment_hash("Good morning."): "Bonjour.", segment_hash("Thanks."): "Merci."}
+    assert lookup_segments(db, "en", "de", ["Thanks."]) == {}
+
+
+def test_existing_segments_are_left_alone(db):
+    store_segments(db, "en", "fr", [("Thanks.", "Merci.")])
+    assert store_segments(db, "en", "fr", [("Thanks.", "Merci bien."), ("Bye.", "Au revoir.")]) == 1
+    assert lookup_segments(db, "en", "fr", ["Thanks."]) == {segment_hash("Thanks."): "Merci."}
+
+
+def test_conflicting_segment_does_not_drop_the_batch(db, monkeypatch):
+    from service.langauge import translation_memory
+    store_segments(db, "en", "fr", [("Thanks.", "Merci.")])
+    # Another request stores "Thanks." between this request's lookup and insert
+    monkeypatch.setattr(translation_memory, "lookup_segments", lambda *args: {})
+    assert store_segments(db, "en", "fr", [("Thanks.", "Merci bien."), ("Bye.", "Au revoir.")]) == 1
+    assert db.query(TranslationMemory).count() == 2
+
+
+def test_curated_rows_follow_inserts_and_deletes(db):
+    row = LanguageTranslation(input_lang="EN", output_lang="FR", input_text="Thanks.", output_text="Merci beaucoup.")
+    db.add(row)
+    db.commit()
+    assert lookup_segments(db, "en", "fr", ["Thanks."]) == {segment_hash("Thanks."): "Merci beaucoup."}
+
+    db.delete(row)
+    db.commit()
+    assert lookup_segments(db, "en", "fr", ["Thanks."]) == {}